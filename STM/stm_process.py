@@ -0,0 +1,122 @@
+import os
+import glob
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from numpy.polynomial import polynomial as P
+from scipy import ndimage
+
+from stm_reader import load_scan
+
+# =========================
+# STM 高度图处理: 平面扣除 -> 逐行多项式拉平 -> 二维 FFT 找晶格周期; 去噪后的图像只用于显示
+# 全部是整幅数组运算; 整个目录用进程池批量处理, 结果按文件哈希缓存
+# =========================
+
+CACHE_DIR = ".stm_cache"
+CACHE_VERSION = 2  # 处理流程改变时加一, 旧缓存自动失效
+
+
+def plane_level(z):
+    # 最小二乘拟合并扣除平面 z = c0 + c1*x + c2*y
+    ny, nx = z.shape
+    y, x = np.mgrid[0:ny, 0:nx]
+    A = np.column_stack((np.ones(z.size), x.ravel(), y.ravel()))
+    coef, *_ = np.linalg.lstsq(A, z.ravel(), rcond=None)
+    return z - (A @ coef).reshape(z.shape)
+
+
+def flatten_lines(z, order=1):
+    # 每条扫描线各自拟合 order 次多项式并扣除, 所有行一次 polyfit
+    x = np.arange(z.shape[1])
+    coef = P.polyfit(x, z.T, order)
+    return z - P.polyval(x, coef)
+
+
+def denoise(z, median_size=3, gaussian_sigma=1.0):
+    if median_size:
+        z = ndimage.median_filter(z, size=median_size)
+    if gaussian_sigma:
+        z = ndimage.gaussian_filter(z, sigma=gaussian_sigma)
+    return z
+
+
+def fft_lattice(z, pixel_size, n_peaks=3, min_radius=3):
+    # 返回 (功率谱, 峰值列表); 每个峰给出周期 (nm) 与方向角 (度)
+    ny, nx = z.shape
+    window = np.outer(np.hanning(ny), np.hanning(nx))
+    power = np.abs(np.fft.fftshift(np.fft.fft2((z - z.mean()) * window)))**2
+
+    ky = np.fft.fftshift(np.fft.fftfreq(ny, d=pixel_size[1]))
+    kx = np.fft.fftshift(np.fft.fftfreq(nx, d=pixel_size[0]))
+    KX, KY = np.meshgrid(kx, ky)
+
+    # 去掉零频附近; 实图像谱中心对称, 只保留上半平面
+    iy, ix = np.mgrid[0:ny, 0:nx]
+    r = np.hypot(iy - ny // 2, ix - nx // 2)
+    usable = (r >= min_radius) & ((KY > 0) | ((KY == 0) & (KX > 0)))
+    is_peak = (power == ndimage.maximum_filter(power, size=5)) & usable
+
+    idx = np.flatnonzero(is_peak)
+    idx = idx[np.argsort(power.ravel()[idx])[::-1][:n_peaks]]
+    k = np.hypot(KX.ravel()[idx], KY.ravel()[idx])
+    peaks = [{"period": 1 / kk, "angle": np.degrees(np.arctan2(kyy, kxx)), "power": p}
+             for kk, kxx, kyy, p in zip(k, KX.ravel()[idx], KY.ravel()[idx], power.ravel()[idx])]
+    return power, peaks
+
+
+def process_scan(path, order=1, median_size=3, gaussian_sigma=1.0, n_peaks=3):
+    header, raw = load_scan(path)
+    z = np.asarray(raw, dtype=float)
+    z = plane_level(z)
+    z = flatten_lines(z, order)
+    pixel_size = (header["x_size"] / z.shape[1], header["y_size"] / z.shape[0])  # nm
+    # 晶格周期只有几个像素, 去噪的低通会把它滤掉, 所以 FFT 用拉平后的图像, 去噪只用于显示
+    _, peaks = fft_lattice(z, pixel_size, n_peaks)
+    return denoise(z, median_size, gaussian_sigma), peaks
+
+
+def _file_hash(path, settings):
+    h = hashlib.sha1(repr((CACHE_VERSION, settings)).encode())
+    with open(path, "rb") as f:
+        h.update(f.read())
+    return h.hexdigest()
+
+
+def _process_to_cache(path, cache_path, settings):
+    z, peaks = process_scan(path, **settings)
+    np.savez(cache_path, image=z,
+             period=[p["period"] for p in peaks],
+             angle=[p["angle"] for p in peaks],
+             power=[p["power"] for p in peaks])
+    return cache_path
+
+
+def process_folder(folder=".", n_workers=None, **settings):
+    # 返回 {文件名: (处理后图像, 峰值列表)}; 只有内容或参数变化的文件会重新计算
+    cache_dir = os.path.join(folder, CACHE_DIR)
+    os.makedirs(cache_dir, exist_ok=True)
+    paths = sorted(glob.glob(os.path.join(folder, "*.stm")))
+    cache_paths = {p: os.path.join(cache_dir, _file_hash(p, settings) + ".npz") for p in paths}
+
+    todo = [p for p in paths if not os.path.exists(cache_paths[p])]
+    if todo:
+        with ProcessPoolExecutor(n_workers) as pool:
+            list(pool.map(_process_to_cache, todo, [cache_paths[p] for p in todo],
+                          [settings] * len(todo)))
+
+    results = {}
+    for p in paths:
+        with np.load(cache_paths[p]) as d:
+            peaks = [{"period": t, "angle": a, "power": w}
+                     for t, a, w in zip(d["period"], d["angle"], d["power"])]
+            results[os.path.basename(p)] = (d["image"], peaks)
+    return results
+
+
+if __name__ == "__main__":
+    folder = os.path.dirname(os.path.abspath(__file__))
+    for name, (image, peaks) in process_folder(folder).items():
+        lattice = ", ".join(f"{p['period']:.3f} nm @ {p['angle']:.1f}°" for p in peaks)
+        print(f"{name:28s} {lattice}")
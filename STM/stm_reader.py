@@ -0,0 +1,85 @@
+import os
+import re
+import glob
+import struct
+
+import numpy as np
+
+# =========================
+# STMDataFile 读取
+# 文件结构: 3 个 Pascal 字符串 ("STMDataFile", 时间, 日期) + 67 字节参数区 + uint8 高度图
+# 参数区各字段的含义是对比本目录 13 个文件推断出来的:
+#   x_range / y_range 是仪器记录的扫描范围 (V), x_size = x_range * x_sens (nm), 13 个文件都成立
+#   文件名里的 "2V_4V" 是手写的, 不一定可靠: 8V_8V_(150.4,140.4).stm 的参数区记的是 (4, 4);
+#   尺寸以参数区为准, 文件名里的范围另存为 name_range, 不一致时 range_mismatch 为 True
+# =========================
+
+MAGIC = "STMDataFile"
+
+# 参数区: 3 字节填充, 4 个 int32, 7 个 float32, 4 个 int32, 1 个 float32
+_PARAM_FORMAT = "<3x4i7f4if"
+_PARAM_NAMES = ("reserved", "bias", "flag1", "flag2",
+                "gain", "x_range", "y_range", "speed", "x_sens", "y_sens", "z_sens",
+                "x_size", "y_size", "speed_raw", "adc_code", "z_scale")
+_PARAM_SIZE = struct.calcsize(_PARAM_FORMAT)
+
+
+def _read_pascal(buf, pos):
+    n = buf[pos]
+    return buf[pos + 1:pos + 1 + n].decode("ascii"), pos + 1 + n
+
+
+def read_header(path):
+    # 只读文件开头, 不碰像素数据
+    with open(path, "rb") as f:
+        buf = f.read(256)
+    magic, pos = _read_pascal(buf, 0)
+    if magic != MAGIC:
+        raise ValueError(f"{path}: not an STMDataFile")
+    time, pos = _read_pascal(buf, pos)
+    date, pos = _read_pascal(buf, pos)
+
+    header = dict(zip(_PARAM_NAMES, struct.unpack_from(_PARAM_FORMAT, buf, pos)))
+    header["path"] = path
+    header["time"] = time
+    header["date"] = date
+    header["data_offset"] = pos + _PARAM_SIZE
+
+    # 高度图是正方形 uint8 数组, 边长由剩余字节数决定
+    n_pixels = os.path.getsize(path) - header["data_offset"]
+    side = int(round(np.sqrt(n_pixels)))
+    if side * side != n_pixels:
+        raise ValueError(f"{path}: {n_pixels} data bytes is not a square image")
+    header["shape"] = (side, side)
+
+    # 针尖偏移量只记录在文件名里, 如 2V_2V_(151,144).stm
+    match = re.search(r"\(([\d.]+),([\d.]+)\)", os.path.basename(path))
+    header["offset"] = (float(match.group(1)), float(match.group(2))) if match else None
+    match = re.match(r"([\d.]+)V_([\d.]+)V", os.path.basename(path), re.IGNORECASE)
+    header["name_range"] = (float(match.group(1)), float(match.group(2))) if match else None
+    header["range_mismatch"] = match is not None and not np.allclose(
+        header["name_range"], (header["x_range"], header["y_range"]), rtol=1e-6)
+    return header
+
+
+def load_scan(path):
+    # 返回 (header, 高度图), 高度图是只读 memmap, 读到哪一页才真正加载哪一页
+    # 第一行是最下面一条扫描线, 与 JPG 对照时用 imshow(..., origin="lower")
+    header = read_header(path)
+    height = np.memmap(path, dtype=np.uint8, mode="r",
+                       offset=header["data_offset"], shape=header["shape"])
+    return header, height
+
+
+def index_scans(folder="."):
+    # 列出目录下所有扫描的参数, 按文件名排序, 不加载像素
+    return [read_header(path) for path in sorted(glob.glob(os.path.join(folder, "*.stm")))]
+
+
+if __name__ == "__main__":
+    for h in index_scans(os.path.dirname(os.path.abspath(__file__))):
+        print(f"{os.path.basename(h['path']):28s} {h['date']} {h['time']}  "
+              f"range = ({h['x_range']:g}, {h['y_range']:g}) V  "
+              f"size = ({h['x_size']}, {h['y_size']}) nm  bias = {h['bias']}  offset = {h['offset']}")
+        if h["range_mismatch"]:
+            print(f"  注意: 文件名中的范围 {h['name_range']} 与参数区不一致, 尺寸按参数区计算")
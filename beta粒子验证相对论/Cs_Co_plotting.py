@@ -1,12 +1,16 @@
 import numpy as np
 import matplotlib.pyplot as plt
-from statsmodels.nonparametric.smoothers_lowess import lowess
+from lowess import lowess
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.text_cache import load_text
 
 # 文件名
 filename = "Cs.txt"
 
 # 读取数据
-data = np.loadtxt(filename)
+data = load_text(filename)
 x = data[:, 0]
 y = data[:, 1]
 
@@ -16,12 +20,8 @@ frac_values[x < 112] = 0.015
 frac_values[(x >= 112) & (x < 180)] = 0.01
 frac_values[x >= 180] = 0.05
 
-# 自定义局部 LOWESS
-smoothed = np.zeros_like(y)
-for i, xi in enumerate(x):
-    f = frac_values[i]
-    y_fit = lowess(y, x, frac=f, it=0, return_sorted=False)
-    smoothed[i] = y_fit[i]
+# 变带宽 LOWESS: 每个点用自己区间的 frac, 一次算完
+smoothed = lowess(x, y, frac_values)
 
 # 绘图
 fig, ax = plt.subplots(figsize=(8/1.2, 6/1.2))
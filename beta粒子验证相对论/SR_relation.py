@@ -1,10 +1,15 @@
 import matplotlib.pyplot as plt
 import numpy as np
-
-# 提取的实验数据点
-pc_exp = np.array([0.81 , 0.99 , 1.17 , 1.44 , 1.71 , 1.89])  # MeV
-Ek_exp = np.array([0.402, 0.558, 0.740, 0.994, 1.254, 1.425])  # MeV
-Ek_exp2 = np.array([0.382, 0.570, 0.727, 0.962, 1.176, 1.362])  # MeV
+from momentum_energy import run
+
+# 实验数据点: 合并能谱的峰位 -> 刻度 -> 铝膜 (Air 另加空气) 修正 -> 动能, 位置 -> 动量 (见 momentum_energy.py)
+results = run()
+pc_exp = results["Vac"]["pc"]  # MeV
+Ek_exp = results["Vac"]["Ek"]  # MeV
+Ek_exp2 = results["Air"]["Ek"]  # MeV
+for medium, r in results.items():
+    print(f"{medium}: chi2 relativistic = {r['chi2_relativistic']:.1f}, classical = {r['chi2_classical']:.1f}"
+          f"  (Ek corrected for: {r['corrections']}; errors: {r['errors']})")
 
 # 创建理论曲线的Ek值范围
 Ek_theory = np.linspace(0, 3, 100)  # MeV
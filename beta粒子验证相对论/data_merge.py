@@ -1,20 +1,7 @@
-import numpy as np
+import os
+from run_merge import merge_runs
 
-# 输入的四个文件名
-files = ["No1_Pos150mm_Air.txt", "No2_Pos150mm_Air.txt", "No3_Pos150mm_Air.txt", "No4_Pos150mm_Air.txt"]
-
-# 读取第一个文件
-data = np.loadtxt(files[0], dtype=int)
-col1 = data[:, 0]       # 第一列
-col2_sum = data[:, 1]   # 第二列（初始化总和）
-
-# 依次读取后面的文件并加上第二列
-for fname in files[1:]:
-    data = np.loadtxt(fname, dtype=int)
-    col2_sum += data[:, 1]
-
-# 合并成新的二维数组
-result = np.column_stack((col1, col2_sum))
-
-# 保存到新文件，整数格式
-np.savetxt("Merged_Pos150mm_Air.txt", result, fmt="%d", delimiter="\t")
+# 合并本目录下 air/ 与 vac/ 中所有 NoK_PosXXXmm_{Air,Vac}.txt, 输入没变的位置不会重新合并
+root = os.path.dirname(os.path.abspath(__file__))
+for out, state in merge_runs(root).items():
+    print(f"{state:8s} {os.path.relpath(out, root)}")
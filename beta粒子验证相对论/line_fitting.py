@@ -1,17 +1,19 @@
 import numpy as np
 import matplotlib.pyplot as plt
-
-# 四个点
-x_points = np.array([271, 306, 47, 153])
-y_points = np.array([1173.237, 1332.501, 184.323, 661.660])
-
-# 线性拟合
-coeff = np.polyfit(x_points, y_points, 1)
-a, b = coeff
+import os
+from momentum_energy import calibrate
+
+# 四条谱线 (Co.txt 的 1173 / 1332 keV, Cs.txt 的 184 / 662 keV) 见 momentum_energy.calibration_lines,
+# 峰位由能谱拟合得到; 线性拟合结果缓存在 common/.calibration, 数据不变时直接读取
+here = os.path.dirname(os.path.abspath(__file__))
+cal = calibrate(here)
+x_points = np.array(cal["channels"])
+y_points = np.array(cal["energies"])
+a, b = cal["coef"]
+a_err, b_err = cal["coef_err"]
 
 # 相关系数 r
-r_matrix = np.corrcoef(x_points, y_points)
-r = r_matrix[0, 1]
+r = cal["r"]
 
 # 拟合直线
 x_fit = np.linspace(min(x_points)-10, max(x_points)+10, 100)
@@ -37,5 +39,7 @@ ax.tick_params(axis='both', which='major', labelsize=14)
 plt.tight_layout()
 plt.show()
 
+print("Peak channels: " + ", ".join(f"{c:.1f}" for c in x_points))
 print(f"Linear fit: y = {a:.4f} * x + {b:.4f}")
+print(f"Slope = {a:.4f} ± {a_err:.4f} keV/channel, intercept = {b:.2f} ± {b_err:.2f} keV")
 print(f"Correlation coefficient r = {r:.4f}")
@@ -0,0 +1,221 @@
+import os
+import re
+import sys
+import glob
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from scipy import ndimage
+
+from run_merge import read_run
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.calibration import calibrate_peaks, to_energy
+from common.peak_fit import fit_peaks
+
+# =========================
+# β 磁谱仪: 合并能谱 -> 峰位道址 -> 能量 -> 动量, 与相对论 / 经典关系比较
+#   峰位: 所有 Merged_PosXXXmm_{Air,Vac}.txt 并行读入, 堆成一批, 每条谱的峰 (x > 50 道) 用
+#         高斯 + 线性本底一次拟合 (common/peak_fit), 初值为平滑后的最大值
+#   能量: NaI 刻度 (与 line_fitting.py 同一个探测器名, 同一组系数), 得到闪烁体里沉积的能量 E1
+#   铝窗: 电子进入闪烁体前穿过铝膜, 用 Bethe 公式的碰撞阻止本领 S(E) 从 E1 反推入射动能 Ek,
+#         dEk / dE1 = S(Ek) / S(E1), 误差照此传递
+#   空气: Air 的数据电子沿半圆轨道在空气里走 pi R, 同样反推; 落点给出的是轨道上的平均动量,
+#         所以只补回半条轨道的损失, 得到轨道中点的动能; Vac 不做这一步
+#   误差: 统计 (峰位 + 刻度系数) 与系统 (铝窗厚度 ±10%, 空气路径在 0 到整条轨道之间) 分开给出,
+#         比较用的 chi2 用两者的平方和; 系统误差在各点之间是相关的, chi2 只是近似
+#   动量: 180° 聚焦, 源在 x0, 探测器在 x 时轨道半径 R = (x - x0) / 2, pc = e c B R
+#   比较: Ek 与同一 pc 下的相对论 sqrt(pc^2 + m^2) - m 和经典 pc^2 / (2m) 的偏差
+# =========================
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+MERGED_PATTERN = re.compile(r"Merged_Pos(\d+)mm_(Air|Vac)\.txt$")
+
+M_E = 0.51099895  # MeV
+FIELD = 0.0600  # T
+SOURCE_POSITION = 60.0  # mm
+
+# 探测器窗: 200 um 铝密封窗 + 20 um 铝反射膜, 实验讲义给出的标称值 (本实验没有单独测量)
+WINDOW_THICKNESS = 220e-4  # cm
+AL_DENSITY = 2.699  # g/cm^3
+WINDOW = AL_DENSITY * WINDOW_THICKNESS  # 质量厚度 (g/cm^2)
+WINDOW_TOLERANCE = 0.10  # 标称厚度的相对不确定度 (1 sigma), 估计值
+# 阻止本领用到的 Z/A 与平均激发能 (MeV)
+AL_Z_OVER_A = 13 / 26.9815
+AL_I = 166e-6
+AIR_Z_OVER_A = 0.49919
+AIR_I = 85.7e-6
+AIR_DENSITY = 1.205e-3  # g/cm^3, 20 °C, 1 atm
+K_BETHE = 0.1535375  # 2 pi N_A r_e^2 m c^2 (MeV cm^2 / g)
+
+
+def calibration_lines(folder=HERE):
+    # (能谱文件, 能量 keV, 大致道址)
+    return [
+        (os.path.join(folder, "Co.txt"), 1173.237, 271),
+        (os.path.join(folder, "Co.txt"), 1332.501, 306),
+        (os.path.join(folder, "Cs.txt"), 184.323, 47),
+        (os.path.join(folder, "Cs.txt"), 661.660, 153),
+    ]
+
+
+def calibrate(folder=HERE):
+    return calibrate_peaks("beta_NaI", calibration_lines(folder))
+
+
+def find_merged(root=HERE):
+    # {(介质, 位置 mm): 文件}
+    files = {}
+    for path in glob.glob(os.path.join(root, "*", "merged", "Merged_Pos*mm_*.txt")):
+        match = MERGED_PATTERN.search(os.path.basename(path))
+        if match:
+            files[(match.group(2), int(match.group(1)))] = path
+    return dict(sorted(files.items()))
+
+
+def load_merged(paths, n_workers=None):
+    # 并行读入, 返回 (道址 (谱数, 道数), 计数 (谱数, 道数)); 道数不同时补 nan / 0
+    with ThreadPoolExecutor(n_workers) as pool:
+        runs = list(pool.map(read_run, paths))
+    n = max(len(ch) for ch, _ in runs)
+    channels = np.full((len(runs), n), np.nan)
+    counts = np.zeros((len(runs), n))
+    for i, (ch, c) in enumerate(runs):
+        channels[i, :len(ch)] = ch
+        counts[i, :len(c)] = c
+    return channels, counts
+
+
+def peak_channels(channels, counts, min_channel=50, sigma=14, smooth=6):
+    # 每条谱一个峰; 返回 {"channel", "channel_err", "fwhm", "chi2_red"}, 单位为道
+    smoothed = ndimage.gaussian_filter1d(counts, smooth, axis=1)
+    smoothed[~(channels > min_channel)] = -np.inf
+    start = np.argmax(smoothed, axis=1)
+    fit = fit_peaks(counts, np.arange(len(counts)), start, sigma=sigma)
+    # 下标换成道址 (道址等间隔)
+    step = channels[:, 1] - channels[:, 0]
+    return {
+        "channel": channels[:, 0] + step * fit["centroid"],
+        "channel_err": np.abs(step) * fit["centroid_err"],
+        "fwhm": np.abs(step) * fit["fwhm"],
+        "chi2_red": fit["chi2_red"],
+    }
+
+
+def stopping_power(E, z_over_a=AL_Z_OVER_A, mean_excitation=AL_I):
+    # 电子的碰撞阻止本领 (MeV cm^2 / g), Bethe 公式, 不含密度效应修正; 默认为铝
+    t = np.asarray(E, dtype=float) / M_E
+    beta2 = 1 - 1 / (t + 1)**2
+    F = 1 - beta2 + (t**2 / 8 - (2 * t + 1) * np.log(2)) / (t + 1)**2
+    return K_BETHE * z_over_a / beta2 * (np.log(t**2 * (t + 2) / (2 * (mean_excitation / M_E)**2)) + F)
+
+
+def window_correction(E1, thickness=WINDOW, n_steps=50, z_over_a=AL_Z_OVER_A, mean_excitation=AL_I):
+    # 由穿过质量厚度 thickness (g/cm^2, 可以每点不同) 后的能量 E1 (MeV) 反推之前的动能;
+    # 沿厚度 RK4 积分 dE / d(rho x) = S(E), 所有点一起; 返回 (动能, dEk / dE1)
+    E = np.asarray(E1, dtype=float).copy()
+    h = np.asarray(thickness, dtype=float) / n_steps
+
+    def S(E):
+        return stopping_power(E, z_over_a, mean_excitation)
+
+    for _ in range(n_steps):
+        k1 = S(E)
+        k2 = S(E + h / 2 * k1)
+        k3 = S(E + h / 2 * k2)
+        k4 = S(E + h * k3)
+        E += h / 6 * (k1 + 2 * k2 + 2 * k3 + k4)
+    return E, S(E) / S(E1)
+
+
+def air_correction(E1, position, source=SOURCE_POSITION, n_steps=50, fraction=0.5):
+    # 穿过铝窗前的能量 E1 (MeV) -> 轨道中点的动能: 补回 fraction 个半圆 (默认 pi R / 2) 空气中的损失
+    path = fraction * np.pi * (np.asarray(position, dtype=float) - source) / 2 / 10  # cm
+    return window_correction(E1, AIR_DENSITY * path, n_steps, AIR_Z_OVER_A, AIR_I)
+
+
+def momentum(position, field=FIELD, source=SOURCE_POSITION):
+    # pc (MeV) = c e B R, R = (x - x0) / 2
+    return 299.792458 * field * (np.asarray(position, dtype=float) - source) / 2 / 1000
+
+
+def compare(pc, Ek, Ek_err):
+    # 同一 pc 下两种理论的动能, 以及按 Ek 误差算的 chi2
+    relativistic = np.sqrt(pc**2 + M_E**2) - M_E
+    classical = pc**2 / (2 * M_E)
+    return {
+        "Ek_relativistic": relativistic,
+        "Ek_classical": classical,
+        "chi2_relativistic": float(np.sum(((Ek - relativistic) / Ek_err)**2)),
+        "chi2_classical": float(np.sum(((Ek - classical) / Ek_err)**2)),
+    }
+
+
+# 每种介质的 Ek 做了哪些能量损失修正
+CORRECTIONS = {
+    "Vac": f"Al window {WINDOW_THICKNESS * 1e4:.0f} um",
+    "Air": f"Al window {WINDOW_THICKNESS * 1e4:.0f} um + air along half the orbit",
+}
+# 每种介质的 Ek 误差包含哪些项
+ERRORS = {
+    "Vac": f"stat (peak + calibration) + sys (window ±{WINDOW_TOLERANCE:.0%})",
+    "Air": f"stat (peak + calibration) + sys (window ±{WINDOW_TOLERANCE:.0%}, air path 0 ~ full orbit)",
+}
+
+
+def run(root=HERE, n_workers=None, **peak_options):
+    # 返回 {介质: {"position", "channel", "channel_err", "E1", "Ek", "Ek_stat", "Ek_sys", "Ek_err", "pc",
+    #             "corrections", "errors", 比较结果...}}; Ek_err 为 Ek_stat 与 Ek_sys 的平方和开方
+    files = find_merged(root)
+    keys = list(files)
+    channels, counts = load_merged(list(files.values()), n_workers)
+    peaks = peak_channels(channels, counts, **peak_options)
+
+    cal = calibrate(root)
+    E1 = to_energy(cal, peaks["channel"]) / 1000  # MeV
+    # 峰位误差与刻度系数误差都传到能量上
+    J = np.vander(peaks["channel"], cal["order"] + 1)
+    E1_var = (np.polyval(np.polyder(cal["coef"]), peaks["channel"]) * peaks["channel_err"])**2 \
+        + np.einsum("ij,jk,ik->i", J, np.array(cal["cov"]), J)
+    E1_err = np.sqrt(E1_var) / 1000
+    Ek, gain = window_correction(E1)
+    # 铝窗厚度的系统误差: 厚度取 (1 ± tolerance) 倍时 Ek 变化的一半
+    window_sys = (window_correction(E1, WINDOW * (1 + WINDOW_TOLERANCE))[0]
+                  - window_correction(E1, WINDOW * (1 - WINDOW_TOLERANCE))[0]) / 2
+    air_sys = np.zeros_like(Ek)
+    position = np.array([pos for _, pos in keys])
+    medium = np.array([m for m, _ in keys])
+    air = medium == "Air"
+    if np.any(air):
+        # 空气路径的系统误差: 不补与补回整条轨道的差的一半
+        Ek_window = Ek[air]
+        air_sys[air] = (air_correction(Ek_window, position[air], fraction=1)[0] - Ek_window) / 2
+        Ek[air], air_gain = air_correction(Ek_window, position[air])
+        gain[air] *= air_gain
+        window_sys[air] *= air_gain
+    Ek_stat = gain * E1_err
+    Ek_sys = np.hypot(window_sys, air_sys)
+    Ek_err = np.hypot(Ek_stat, Ek_sys)
+    pc = momentum(position)
+
+    results = {}
+    for m in np.unique(medium):
+        sel = medium == m
+        r = {"position": position[sel], "channel": peaks["channel"][sel], "channel_err": peaks["channel_err"][sel],
+             "E1": E1[sel], "Ek": Ek[sel], "Ek_stat": Ek_stat[sel], "Ek_sys": Ek_sys[sel], "Ek_err": Ek_err[sel],
+             "pc": pc[sel], "corrections": CORRECTIONS[m], "errors": ERRORS[m]}
+        r.update(compare(r["pc"], r["Ek"], r["Ek_err"]))
+        results[m] = r
+    return results
+
+
+if __name__ == "__main__":
+    for m, r in run().items():
+        print(f"{m} (Ek corrected for: {r['corrections']})")
+        print(f"{m}:  position  channel        E1 (MeV)  Ek ± stat ± sys (MeV)     pc (MeV)  Ek_rel  Ek_cls")
+        for i in range(len(r["position"])):
+            print(f"      {r['position'][i]:4d} mm  {r['channel'][i]:6.1f} ± {r['channel_err'][i]:3.1f}  "
+                  f"{r['E1'][i]:.3f}     {r['Ek'][i]:.3f} ± {r['Ek_stat'][i]:.3f} ± {r['Ek_sys'][i]:.3f}   "
+                  f"{r['pc'][i]:.3f}     {r['Ek_relativistic'][i]:.3f}   {r['Ek_classical'][i]:.3f}")
+        print(f"  chi2: relativistic {r['chi2_relativistic']:.1f}, classical {r['chi2_classical']:.1f} "
+              f"({len(r['position'])} points; errors: {r['errors']}, sys correlated between points)")
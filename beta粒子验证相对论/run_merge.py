@@ -0,0 +1,91 @@
+import os
+import re
+import glob
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# =========================
+# 多次测量合并: 找出所有 NoK_PosXXXmm_{Air,Vac}.txt, 按 (介质, 位置) 分组,
+# 每组按道址对齐, 计数累加到一个预分配的整数数组里, 写成 {air,vac}/merged/Merged_PosXXXmm_{Air,Vac}.txt
+# 文件并行读取; 每组输入文件的大小和修改时间记在 merged/.merge_manifest.json, 没变的组直接跳过
+# =========================
+
+RUN_PATTERN = re.compile(r"No(\d+)_Pos(\d+)mm_(Air|Vac)\.txt$")
+MANIFEST = ".merge_manifest.json"
+
+
+def find_runs(root="."):
+    # 返回 {(介质, 位置 mm): [按序号排好的文件]}
+    groups = {}
+    for path in glob.glob(os.path.join(root, "**", "No*_Pos*mm_*.txt"), recursive=True):
+        match = RUN_PATTERN.search(os.path.basename(path))
+        if match:
+            run, pos, medium = match.groups()
+            groups.setdefault((medium, int(pos)), []).append((int(run), path))
+    return {key: [p for _, p in sorted(runs)] for key, runs in sorted(groups.items())}
+
+
+def read_run(path):
+    # 两列整数 (道址, 计数), 一次读入按空白切分
+    with open(path, "rb") as f:
+        data = np.array(f.read().split(), dtype=np.int64)
+    data = data.reshape(-1, 2)
+    return data[:, 0], data[:, 1]
+
+
+def merge_group(paths, pool=None):
+    # 按道址对齐求和; 某次测量缺少的道按 0 计
+    runs = list(pool.map(read_run, paths)) if pool else [read_run(p) for p in paths]
+    lo = min(ch.min() for ch, _ in runs)
+    hi = max(ch.max() for ch, _ in runs)
+    total = np.zeros(hi - lo + 1, dtype=np.int64)
+    present = np.zeros(hi - lo + 1, dtype=bool)
+    for ch, counts in runs:
+        total[ch - lo] += counts
+        present[ch - lo] = True
+    channels = np.arange(lo, hi + 1)[present]
+    return channels, total[present]
+
+
+def _signature(paths):
+    return [[os.path.basename(p), os.path.getsize(p), os.stat(p).st_mtime_ns] for p in paths]
+
+
+def merged_path(root, medium, pos):
+    return os.path.join(root, medium.lower(), "merged", f"Merged_Pos{pos}mm_{medium}.txt")
+
+
+def merge_runs(root=".", force=False, n_workers=None):
+    # 返回 {输出文件: "merged" 或 "skipped"}
+    status = {}
+    with ThreadPoolExecutor(n_workers) as pool:
+        for (medium, pos), paths in find_runs(root).items():
+            out = merged_path(root, medium, pos)
+            manifest_path = os.path.join(os.path.dirname(out), MANIFEST)
+            manifest = {}
+            if os.path.exists(manifest_path):
+                with open(manifest_path, "r", encoding="utf-8") as f:
+                    manifest = json.load(f)
+
+            name = os.path.basename(out)
+            signature = _signature(paths)
+            if not force and os.path.exists(out) and manifest.get(name) == signature:
+                status[out] = "skipped"
+                continue
+
+            channels, total = merge_group(paths, pool)
+            os.makedirs(os.path.dirname(out), exist_ok=True)
+            np.savetxt(out, np.column_stack((channels, total)), fmt="%d", delimiter="\t")
+            manifest[name] = signature
+            with open(manifest_path, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, indent=1)
+            status[out] = "merged"
+    return status
+
+
+if __name__ == "__main__":
+    root = os.path.dirname(os.path.abspath(__file__))
+    for out, state in merge_runs(root).items():
+        print(f"{state:8s} {os.path.relpath(out, root)}")
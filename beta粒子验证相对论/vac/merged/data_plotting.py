@@ -1,6 +1,10 @@
 import numpy as np
 import matplotlib.pyplot as plt
 import re
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))
+from common.text_cache import load_text
 
 # 文件列表
 files = [
@@ -18,7 +22,7 @@ colors = ["tab:blue", "tab:orange", "tab:green",
 plt.figure(figsize=(10, 6))
 
 for fname, color in zip(files, colors):
-    data = np.loadtxt(fname)
+    data = load_text(fname)
     x = data[:, 0]
     y = data[:, 1]
 
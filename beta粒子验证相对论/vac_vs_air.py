@@ -1,6 +1,10 @@
 import numpy as np
 import matplotlib.pyplot as plt
 import re
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.text_cache import load_text
 
 # 两个文件
 files = [
@@ -14,7 +18,7 @@ colors = ["tab:brown", "#D2B48C"]  # 深红和浅红
 plt.figure(figsize=(8, 6))
 
 for fname, color in zip(files, colors):
-    data = np.loadtxt(fname)
+    data = load_text(fname)
     x = data[:, 0]
     y = data[:, 1]
 
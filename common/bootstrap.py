@@ -0,0 +1,109 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from scipy.optimize import curve_fit
+
+# =========================
+# Bootstrap / Monte-Carlo 不确定度
+# 每次重拟合都从名义解 popt 出发, 按块计算;
+# 每块的随机种子由 SeedSequence(seed).spawn 给出, 结果与进程数无关
+# 默认在本进程里逐块计算; n_workers > 1 (或 None = 全部 CPU) 时分发到进程池,
+# 子进程用平台默认的启动方式 (macOS / Windows 为 spawn, 会重新导入主模块),
+# 所以只能从有 if __name__ == "__main__": 保护的入口调用
+# =========================
+
+
+def line(x, slope, intercept):
+    # 线性模型, 供手写 OLS 的脚本使用
+    return slope * x + intercept
+
+
+def _refit_chunk(model, x, y, popt, method, sigma, jac, n, seed):
+    rng = np.random.default_rng(seed)
+    y_fit = model(x, *popt)
+    resid = y - y_fit
+    resid = resid - resid.mean()
+    if sigma is None:
+        # 没有给出测量误差时, 用残差估计 (自由度 N - p)
+        sigma_mc = np.full_like(y, np.sqrt(np.sum(resid**2) / max(len(y) - len(popt), 1)))
+    else:
+        sigma_mc = np.broadcast_to(sigma, y.shape)
+
+    out = np.full((n, len(popt)), np.nan)
+    for i in range(n):
+        x_b, s_b = x, sigma
+        if method == "residual":
+            y_b = y_fit + rng.choice(resid, size=len(y))
+        elif method == "pairs":
+            idx = rng.integers(0, len(y), len(y))
+            x_b, y_b = x[idx], y[idx]
+            s_b = None if sigma is None else sigma_mc[idx]
+        elif method == "montecarlo":
+            y_b = y_fit + rng.normal(0.0, sigma_mc)
+        else:
+            raise ValueError(f"unknown method: {method}")
+        try:
+            out[i] = curve_fit(model, x_b, y_b, p0=popt, sigma=s_b, jac=jac)[0]
+        except (RuntimeError, ValueError):
+            # 个别重采样拟合不收敛时记为 NaN, 统计时跳过
+            continue
+    return out
+
+
+def _executor(n_workers):
+    # 只有调用者明确要求多进程时才建进程池
+    if n_workers is not None and n_workers <= 1:
+        return None
+    return ProcessPoolExecutor(n_workers)
+
+
+def _bootstrap_samples(model, x, y, popt, n_boot, method, sigma, jac, n_workers, chunk_size, seed):
+    # 逐块产出 (样本数组, 已完成的行), 未完成或未收敛的行为 NaN
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    popt = np.asarray(popt, dtype=float)
+    sigma = None if sigma is None else np.asarray(sigma, dtype=float)
+
+    sizes = [min(chunk_size, n_boot - s) for s in range(0, n_boot, chunk_size)]
+    starts = np.cumsum([0] + sizes[:-1])
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    samples = np.full((n_boot, len(popt)), np.nan)
+    done = np.zeros(n_boot, dtype=bool)
+    tasks = [(model, x, y, popt, method, sigma, jac, n, s) for n, s in zip(sizes, seeds)]
+
+    executor = _executor(n_workers)
+    if executor is None:
+        for start, n, task in zip(starts, sizes, tasks):
+            samples[start:start + n] = _refit_chunk(*task)
+            done[start:start + n] = True
+            yield samples, done
+        return
+
+    with executor:
+        futures = {executor.submit(_refit_chunk, *task): (start, n)
+                   for start, n, task in zip(starts, sizes, tasks)}
+        for future in as_completed(futures):
+            start, n = futures[future]
+            samples[start:start + n] = future.result()
+            done[start:start + n] = True
+            yield samples, done
+
+
+def iter_bootstrap(model, x, y, popt, n_boot=10000, method="residual", sigma=None,
+                   jac=None, q=(2.5, 50, 97.5), n_workers=1, chunk_size=250, seed=0):
+    # 每完成一块就给出 (已完成次数, 当前百分位数), 百分位数形状为 (len(q), len(popt))
+    for samples, done in _bootstrap_samples(model, x, y, popt, n_boot, method, sigma, jac,
+                                            n_workers, chunk_size, seed):
+        yield int(done.sum()), np.nanpercentile(samples[done], q, axis=0)
+
+
+def bootstrap_fit(model, x, y, popt, n_boot=10000, method="residual", sigma=None,
+                  jac=None, q=(2.5, 50, 97.5), n_workers=1, chunk_size=250, seed=0):
+    # 返回 {"samples": (n_boot, p), "percentiles": (len(q), p), "std": (p,)}
+    samples = None
+    for samples, _ in _bootstrap_samples(model, x, y, popt, n_boot, method, sigma, jac,
+                                         n_workers, chunk_size, seed):
+        pass
+    return {"samples": samples,
+            "percentiles": np.nanpercentile(samples, q, axis=0),
+            "std": np.nanstd(samples, axis=0, ddof=1)}
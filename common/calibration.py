@@ -0,0 +1,117 @@
+import os
+import json
+import hashlib
+
+import numpy as np
+
+from common.peak_fit import fit_peaks
+from common.regression import fit_line
+from common.text_cache import load_text
+
+# =========================
+# 能量刻度的拟合与持久化
+# 刻度 E = polyval(coef, 道址) 按 "探测器名 + 输入数据哈希" 存成 JSON, 数据和设置不变就直接读缓存,
+# 各脚本拿到的是同一组系数; 数据一改哈希就变, 自动重新拟合
+# 两种输入:
+#   calibrate_points: 已知的 (道址, 能量) 点, 如 energy_fit.py 里的阈值电压
+#   calibrate_peaks:  能谱文件 + 每条谱线的能量和大致道址, 峰位由 peak_fit 拟合得到
+# =========================
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".calibration")
+
+
+def _key(detector, parts):
+    # 文件只取文件名和内容, 仓库放在哪个目录下都得到同一个键
+    files = [p for p in parts if isinstance(p, str) and os.path.isfile(p)]
+    h = hashlib.sha1(repr([os.path.basename(p) if p in files else p for p in parts]).encode())
+    for p in files:
+        with open(p, "rb") as f:
+            h.update(f.read())
+    return f"{detector}_{h.hexdigest()[:16]}"
+
+
+def _cached(detector, parts, compute, cache_dir, refresh):
+    path = os.path.join(cache_dir, _key(detector, parts) + ".json")
+    if os.path.exists(path) and not refresh:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    cal = compute()
+    cal["detector"] = detector
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(cal, f, indent=2, ensure_ascii=False)
+    return cal
+
+
+def fit_calibration(channels, energies, order=1, channel_errors=None):
+    # 多项式最小二乘, 返回 dict (可直接写成 JSON); coef 按 np.polyval 的顺序, 高次在前
+    x = np.asarray(channels, dtype=float)
+    y = np.asarray(energies, dtype=float)
+    if order == 1:
+        # 直线刻度走 regression 的充分统计量
+        fit = fit_line(x, y)
+        coef = np.array([fit["slope"], fit["intercept"]])
+        cov = np.array([[fit["slope_err"]**2, fit["cov"]], [fit["cov"], fit["intercept_err"]**2]])
+    else:
+        X = np.vander(x, order + 1)
+        coef, *_ = np.linalg.lstsq(X, y, rcond=None)
+        residual = y - X @ coef
+        dof = max(len(x) - order - 1, 1)
+        cov = np.linalg.inv(X.T @ X) * (residual @ residual) / dof
+    cal = {
+        "order": order,
+        "coef": coef.tolist(),
+        "coef_err": np.sqrt(np.diag(cov)).tolist(),
+        "cov": cov.tolist(),
+        "channels": x.tolist(),
+        "energies": y.tolist(),
+        "r": float(np.corrcoef(x, y)[0, 1]),
+    }
+    if channel_errors is not None:
+        cal["channel_errors"] = np.asarray(channel_errors, dtype=float).tolist()
+    return cal
+
+
+def calibrate_points(detector, channels, energies, order=1, cache_dir=CACHE_DIR, refresh=False):
+    parts = (order, np.asarray(channels, dtype=float).tolist(), np.asarray(energies, dtype=float).tolist())
+    return _cached(detector, parts, lambda: fit_calibration(channels, energies, order), cache_dir, refresh)
+
+
+def _load_counts(path):
+    # 一列: 计数, 道址 1, 2, ...; 两列: 道址, 计数
+    data = load_text(path)
+    if data.ndim == 1:
+        return np.arange(1, len(data) + 1, dtype=float), data
+    return data[:, 0], data[:, 1]
+
+
+def calibrate_peaks(detector, lines, order=1, sigma=5, half_width=None, cache_dir=CACHE_DIR, refresh=False):
+    # lines: [(文件, 能量, 大致道址), ...]; 同一文件里的多条谱线和多个文件一起拟合
+    lines = [(os.path.abspath(p), float(e), float(c)) for p, e, c in lines]
+    parts = (order, sigma, half_width) + tuple(x for line in lines for x in line)
+
+    def compute():
+        paths = sorted({p for p, _, _ in lines})
+        spectra = [_load_counts(p) for p in paths]
+        spectrum = [paths.index(p) for p, _, _ in lines]
+        # 大致道址换成数组下标; 道址等间隔
+        center = [int(round(np.interp(c, spectra[s][0], np.arange(len(spectra[s][0])))))
+                  for s, (_, _, c) in zip(spectrum, lines)]
+        fit = fit_peaks([s[1] for s in spectra], spectrum, center, sigma, half_width)
+        channels = [spectra[s][0][0] + (spectra[s][0][1] - spectra[s][0][0]) * mu
+                    for s, mu in zip(spectrum, fit["centroid"])]
+        cal = fit_calibration(channels, [e for _, e, _ in lines], order, fit["centroid_err"])
+        cal["sources"] = [os.path.relpath(p, cache_dir) for p, _, _ in lines]
+        return cal
+
+    return _cached(detector, parts, compute, cache_dir, refresh)
+
+
+def to_energy(cal, channels):
+    return np.polyval(cal["coef"], np.asarray(channels, dtype=float))
+
+
+def load_spectrum(path, cal):
+    # 读能谱并直接换算成能量, 返回 (能量, 计数)
+    channels, counts = _load_counts(path)
+    return to_energy(cal, channels), counts
@@ -0,0 +1,187 @@
+import os
+
+import numpy as np
+from scipy import ndimage
+from scipy.special import erfc
+
+# =========================
+# 能谱峰自动寻找与拟合 (批量)
+# 寻峰: 原始计数与高斯二阶导数核卷积 (对峰有正响应, 对线性本底响应为零),
+#       按泊松误差算出信噪比, 取信噪比超过阈值的局部最大
+# 拟合: 每个峰取 [中心 - half_width, 中心 + half_width] 的窗口,
+#       模型 = 高斯 + 线性本底 (或随峰高斯积分下降的台阶本底), 每峰 5 个参数,
+#       所有能谱的所有峰堆成 (峰数, 窗口宽度) 数组, 一起做 Levenberg-Marquardt, 权重 1/n (泊松)
+# 道址从 1 开始, 与 gamma射线能谱/代码/multi_channel.py 一致; 也可以传入等间隔的横坐标 x (如阈值电压)
+# =========================
+
+SIGMA_TO_FWHM = 2 * np.sqrt(2 * np.log(2))
+
+
+def _as_batch(counts):
+    # 长度不同的能谱 (如 Co_near 只有 1022 道) 补零对齐, valid 标出真实数据
+    if isinstance(counts, np.ndarray) and counts.ndim == 1:
+        counts = [counts]
+    n = max(len(c) for c in counts)
+    batch = np.zeros((len(counts), n))
+    valid = np.zeros((len(counts), n), dtype=bool)
+    for i, c in enumerate(counts):
+        batch[i, :len(c)] = c
+        valid[i, :len(c)] = True
+    return batch, valid
+
+
+def find_peaks(counts, sigma=12, min_snr=5, edge=None):
+    # counts: (能谱数, 道数); 返回 (能谱下标, 峰位下标, 信噪比), 峰位下标从 0 开始
+    counts, valid = _as_batch(counts)
+    k = np.arange(-int(4 * sigma), int(4 * sigma) + 1)
+    kernel = (k**2 / sigma**4 - 1 / sigma**2) * np.exp(-k**2 / (2 * sigma**2)) / (np.sqrt(2 * np.pi) * sigma)
+    response = -ndimage.convolve1d(counts, kernel, axis=1)
+    variance = ndimage.convolve1d(np.maximum(counts, 1), kernel**2, axis=1)
+    snr = response / np.sqrt(variance)
+
+    is_peak = (snr == ndimage.maximum_filter1d(snr, int(3 * sigma), axis=1)) & (snr > min_snr)
+    # 能谱两端的截断会产生假峰; 峰本身就在端点附近 (如阈值扫描的第一个峰) 时由调用者给更小的 edge
+    edge = int(2 * sigma) if edge is None else edge
+    n_valid = valid.sum(axis=1)
+    idx = np.arange(counts.shape[1])
+    is_peak &= (idx >= edge) & (idx < (n_valid - edge)[:, None])
+    spectrum, channel = np.nonzero(is_peak)
+    return spectrum, channel, snr[spectrum, channel]
+
+
+def _model(x, p, x0, background):
+    A, mu, sig, b0, b1 = (p[:, i, None] for i in range(5))
+    z = (x - mu) / sig
+    g = np.exp(-z**2 / 2)
+    J = np.empty(x.shape + (5,))
+    J[..., 0] = g
+    J[..., 1] = A * g * z / sig
+    J[..., 2] = A * g * z**2 / sig
+    J[..., 3] = 1.0
+    if background == "step":
+        # 台阶高度 b1, 形状为高斯的互补积分
+        step = 0.5 * erfc(z / np.sqrt(2))
+        J[..., 1] += b1 * g / (sig * np.sqrt(2 * np.pi))
+        J[..., 2] += b1 * g * z / (sig * np.sqrt(2 * np.pi))
+        J[..., 4] = step
+        f = A * g + b0 + b1 * step
+    else:
+        J[..., 4] = x - x0[:, None]
+        f = A * g + b0 + b1 * (x - x0[:, None])
+    return f, J
+
+
+def _initial_guess(x, y, w, center, sigma, background):
+    # 本底取窗口两端各 3 道, 峰高为中心计数减本底
+    left = y[:, :3].mean(axis=1)
+    right = (y * w)[:, -3:].sum(axis=1) / np.maximum(w[:, -3:].sum(axis=1), 1)
+    b0 = left if background == "step" else (left + right) / 2
+    b1 = (left - right) if background == "step" else (right - left) / (x[:, -1] - x[:, 0])
+    yc = y[np.arange(len(y)), np.argmin(np.abs(x - center[:, None]), axis=1)]
+    bc = right if background == "step" else b0
+    A = np.maximum(yc - bc, 1.0)
+    if background == "step":
+        b0 = right
+    return np.column_stack((A, center.astype(float), np.full(len(y), float(sigma)), b0, b1))
+
+
+def fit_peaks(counts, spectrum, center, sigma=12, half_width=None, background="linear",
+              max_iter=100, tol=1e-8):
+    # 对 (spectrum[i], center[i]) 给出的每个峰拟合高斯 + 本底, 所有峰一次完成
+    # 返回 dict, 每项是长度为峰数的数组, 单位为道 (下标从 0 开始)
+    counts, valid = _as_batch(counts)
+    spectrum = np.asarray(spectrum, dtype=int)
+    center = np.asarray(center, dtype=int)
+    half_width = int(3 * sigma) if half_width is None else half_width
+
+    offsets = np.arange(-half_width, half_width + 1)
+    idx = center[:, None] + offsets
+    inside = (idx >= 0) & (idx < counts.shape[1])
+    idx = np.clip(idx, 0, counts.shape[1] - 1)
+    x = idx.astype(float)
+    y = counts[spectrum[:, None], idx]
+    w = np.where(inside & valid[spectrum[:, None], idx], 1 / np.maximum(y, 1), 0.0)
+
+    p = _initial_guess(x, y, w, center, sigma, background)
+    lam = np.full(len(p), 1e-3)
+
+    def chi2_of(p):
+        f, J = _model(x, p, center, background)
+        r = y - f
+        return (w * r**2).sum(axis=1), r, J
+
+    chi2, r, J = chi2_of(p)
+    for _ in range(max_iter):
+        Jw = J * w[..., None]
+        H = Jw.transpose(0, 2, 1) @ J
+        grad = (Jw * r[..., None]).sum(axis=1)
+        damped = H + lam[:, None, None] * np.eye(5) * np.diagonal(H, axis1=1, axis2=2)[:, None, :]
+        step = np.linalg.solve(damped + 1e-12 * np.eye(5), grad[..., None])[..., 0]
+        trial = p + step
+        trial[:, 2] = np.abs(trial[:, 2])
+        chi2_new, r_new, J_new = chi2_of(trial)
+
+        # 逐峰决定是否接受这一步; 峰位偏离寻峰结果超过 sigma 或峰宽超过窗口的步不接受
+        better = (chi2_new < chi2) & (np.abs(trial[:, 1] - center) < sigma) \
+            & (trial[:, 2] < half_width) & (trial[:, 2] > 0.5)
+        p[better], chi2[better] = trial[better], chi2_new[better]
+        r[better], J[better] = r_new[better], J_new[better]
+        lam = np.where(better, lam / 10, lam * 10)
+        if np.all(np.abs(step) <= tol * (np.abs(p) + tol)) or np.all(lam > 1e10):
+            break
+
+    Jw = J * w[..., None]
+    dof = np.maximum((w > 0).sum(axis=1) - 5, 1)
+    cov = np.linalg.pinv(Jw.transpose(0, 2, 1) @ J) * (chi2 / dof)[:, None, None]
+
+    A, mu, sig = p[:, 0], p[:, 1], p[:, 2]
+    area = A * sig * np.sqrt(2 * np.pi)
+    # 峰位处的本底计数
+    baseline = p[:, 3] + (0.5 * p[:, 4] if background == "step" else p[:, 4] * (mu - center))
+    area_var = 2 * np.pi * (sig**2 * cov[:, 0, 0] + A**2 * cov[:, 2, 2] + 2 * A * sig * cov[:, 0, 2])
+    return {
+        "spectrum": spectrum,
+        "centroid": mu,
+        "centroid_err": np.sqrt(cov[:, 1, 1]),
+        "fwhm": SIGMA_TO_FWHM * sig,
+        "fwhm_err": SIGMA_TO_FWHM * np.sqrt(cov[:, 2, 2]),
+        "area": area,
+        "area_err": np.sqrt(np.maximum(area_var, 0)),
+        "height": A,
+        "baseline": baseline,
+        "background": p[:, 3:],
+        "chi2_red": chi2 / dof,
+    }
+
+
+def analyze(counts, x=None, sigma=12, min_snr=5, background="linear", half_width=None, edge=None):
+    # 寻峰 + 拟合, counts 可以是一条能谱或一组能谱
+    # 返回每条能谱一个 dict; x 为等间隔横坐标, 默认道址 1, 2, ..., 结果换算到 x 的单位
+    # edge: 两端不寻峰的点数, 默认 2 sigma (见 find_peaks)
+    single = isinstance(counts, np.ndarray) and counts.ndim == 1
+    batch, _ = _as_batch(counts)
+    spectrum, channel, snr = find_peaks(batch, sigma, min_snr, edge)
+    fit = fit_peaks(batch, spectrum, channel, sigma, half_width, background)
+
+    x0, dx = (1.0, 1.0) if x is None else (x[0], x[1] - x[0])
+    scale = {"centroid": dx, "centroid_err": abs(dx), "fwhm": abs(dx), "fwhm_err": abs(dx),
+             "area": 1.0, "area_err": 1.0, "height": 1.0, "baseline": 1.0, "chi2_red": 1.0}
+    results = []
+    for i in range(len(batch)):
+        sel = spectrum == i
+        r = {key: fit[key][sel] * s for key, s in scale.items()}
+        r["centroid"] = r["centroid"] + x0
+        r["snr"] = snr[sel]
+        results.append(r)
+    return results[0] if single else results
+
+
+if __name__ == "__main__":
+    folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "gamma射线能谱")
+    names = ["Cs_near", "Co_near", "Cs_far", "Cs_Co_far"]
+    spectra = [np.loadtxt(os.path.join(folder, f"2300017787_{name}.txt")) for name in names]
+    for name, r in zip(names, analyze(spectra)):
+        print(name)
+        for c, dc, w, dw, a, da in zip(r["centroid"], r["centroid_err"], r["fwhm"], r["fwhm_err"],
+                                       r["area"], r["area_err"]):
+            print(f"  道址 {c:7.2f} ± {dc:.2f}   FWHM {w:6.2f} ± {dw:.2f}   净面积 {a:9.0f} ± {da:.0f}")
@@ -0,0 +1,112 @@
+import numpy as np
+from scipy import stats
+
+# =========================
+# 直线拟合 y = slope * x + intercept 的充分统计量
+# 只保存累加量 n, sum w, sum w*x, sum w*y, sum w*x^2, sum w*x*y, sum w*y^2,
+# 加点 / 删点只改这七个数 (O(1)), 斜率、截距、误差、r、t 值都由它们直接算出
+# 数组的最后一维是数据点, 前面的维度是互相独立的序列, 成千上万条直线一次算完;
+# 长度不同的序列用 nan 补齐, nan 点不计入
+# 为避免 sum x^2 - (sum x)^2 / n 相减损失精度, 各和相对平移点 (x0, y0) 累加, 默认取第一批数据的均值
+# 权重 w = 1 / sigma^2; absolute_sigma=False 时误差按 chi2 / dof 缩放 (与 curve_fit 相同)
+# =========================
+
+N, W, SX, SY, SXX, SXY, SYY = range(7)
+
+
+def _terms(x, y, w, x0, y0):
+    # 每个序列新数据的七个和, 形状 (..., 7)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    w = np.ones(np.broadcast(x, y).shape) if w is None else np.asarray(w, dtype=float)
+    x, y, w = np.broadcast_arrays(x, y, w)
+    valid = np.isfinite(x) & np.isfinite(y) & np.isfinite(w)
+    w = np.where(valid, w, 0.0)
+    u = np.where(valid, x - x0[..., None], 0.0)
+    v = np.where(valid, y - y0[..., None], 0.0)
+    return np.stack((valid.sum(axis=-1), w.sum(axis=-1), (w * u).sum(axis=-1), (w * v).sum(axis=-1),
+                     (w * u * u).sum(axis=-1), (w * u * v).sum(axis=-1), (w * v * v).sum(axis=-1)), axis=-1)
+
+
+def _mean(a):
+    # 最后一维的均值, 忽略 nan; 全是 nan 时为 0
+    a = np.asarray(a, dtype=float)
+    valid = np.isfinite(a)
+    return np.where(valid, a, 0.0).sum(axis=-1) / np.maximum(valid.sum(axis=-1), 1)
+
+
+class LineFit:
+
+    def __init__(self, x=None, y=None, w=None, shape=(), x0=None, y0=None):
+        # x, y: (..., 点数); 不给时从空的序列开始, shape 为序列的形状
+        if x is not None:
+            shape = np.broadcast(np.asarray(x)[..., 0], np.asarray(y)[..., 0]).shape
+            x0 = _mean(x) if x0 is None else x0
+            y0 = _mean(y) if y0 is None else y0
+        self.x0 = np.broadcast_to(np.asarray(0.0 if x0 is None else x0, dtype=float), shape)
+        self.y0 = np.broadcast_to(np.asarray(0.0 if y0 is None else y0, dtype=float), shape)
+        self.sums = np.zeros(shape + (7,))
+        if x is not None:
+            self.add(x, y, w)
+
+    def _points(self, a):
+        # 维数与序列相同时 (每个序列一个点) 补上点的维度
+        if a is None:
+            return None
+        a = np.asarray(a, dtype=float)
+        return a[..., None] if a.ndim == self.x0.ndim else a
+
+    def add(self, x, y, w=None):
+        # 加入数据点; x, y 的最后一维是点, 与序列同形状时表示每个序列加一个点
+        self.sums += _terms(self._points(x), self._points(y), self._points(w), self.x0, self.y0)
+        return self
+
+    def remove(self, x, y, w=None):
+        # 删去之前加入过的点 (同样的 x, y, w)
+        self.sums -= _terms(self._points(x), self._points(y), self._points(w), self.x0, self.y0)
+        return self
+
+    def result(self, absolute_sigma=False, confidence=0.95):
+        # 返回 dict, 每项的形状与序列相同; 点数不足 3 或 x 全相同的序列给 nan
+        s = self.sums
+        n, w = np.rint(s[..., N]).astype(int), s[..., W]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            u, v = s[..., SX] / w, s[..., SY] / w
+            Sxx = s[..., SXX] - s[..., SX] * u
+            Sxy = s[..., SXY] - s[..., SX] * v
+            Syy = s[..., SYY] - s[..., SY] * v
+            slope = Sxy / Sxx
+            x_mean = self.x0 + u
+            intercept = self.y0 + v - slope * x_mean
+            rss = np.maximum(Syy - slope * Sxy, 0.0)
+            dof = n - 2
+            scale = np.ones_like(rss) if absolute_sigma else rss / dof
+            slope_var = scale / Sxx
+            intercept_var = scale * (1 / w + x_mean**2 / Sxx)
+            r = Sxy / np.sqrt(Sxx * Syy)
+            t = stats.t.ppf(0.5 + confidence / 2, dof)
+            slope_err = np.sqrt(slope_var)
+            p = 2 * stats.t.sf(np.abs(slope / slope_err), dof)
+        return {
+            "slope": slope,
+            "intercept": intercept,
+            "slope_err": slope_err,
+            "intercept_err": np.sqrt(intercept_var),
+            "cov": -x_mean * slope_var,  # slope 与 intercept 的协方差
+            "r": r,
+            "p": p,  # 斜率为零的双侧 t 检验
+            "t": t,  # confidence 置信水平的 t 分位数
+            "slope_ci": np.stack((slope - t * slope_err, slope + t * slope_err), axis=-1),
+            "intercept_ci": np.stack((intercept - t * np.sqrt(intercept_var),
+                                      intercept + t * np.sqrt(intercept_var)), axis=-1),
+            "rss": rss,  # 加权残差平方和 (chi2)
+            "dof": dof,
+            "n": n,
+            "x_mean": x_mean,
+            "Sxx": Sxx,
+        }
+
+
+def fit_line(x, y, w=None, absolute_sigma=False, confidence=0.95):
+    # 一次性拟合, 等价于 LineFit(x, y, w).result(); 形状 (..., 点数) 时对每个序列分别拟合
+    return LineFit(x, y, w).result(absolute_sigma, confidence)
@@ -0,0 +1,89 @@
+import os
+import json
+import hashlib
+
+import numpy as np
+
+# =========================
+# 文本数据的二进制缓存
+# 第一次读某个文件时解析文本, 结果存成同目录下 .npy_cache/ 里的 .npy;
+# 之后文件大小和修改时间都没变就直接 np.load(mmap_mode="r"), 不再解析
+# 大小或时间变了再比较内容哈希: 内容相同只更新记录, 不同才重新解析
+# 解析参数 (skiprows 等) 也是键的一部分, 同一文件不同读法各有一份缓存
+# =========================
+
+CACHE_DIR = ".npy_cache"
+INDEX = "index.json"
+
+
+def parse_text(path, skiprows=0, usecols=None, min_cols=None, encoding="utf-8"):
+    # min_cols 为 None 时与 np.loadtxt 完全相同;
+    # 否则跳过前 min_cols 列不都是数字的行 (表头、说明文字、空行), 与各脚本里 try: float(...) 的写法一致
+    if min_cols is None:
+        return np.loadtxt(path, skiprows=skiprows, usecols=usecols, encoding=encoding)
+
+    def numeric(line):
+        parts = line.split()
+        if len(parts) < min_cols:
+            return False
+        try:
+            [float(p) for p in parts[:min_cols]]
+        except ValueError:
+            return False
+        return True
+
+    with open(path, "r", encoding=encoding, errors="replace") as f:
+        lines = f.read().splitlines()[skiprows:]
+    lines = [line for line in lines if numeric(line)]
+    if usecols is None:
+        usecols = range(min_cols)
+    return np.loadtxt(lines, usecols=usecols)
+
+
+def _sha1(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def load_text(path, parser=parse_text, **options):
+    # 返回只读数组 (memmap); parser 为解析函数, 其余参数原样传给它
+    folder, name = os.path.split(os.path.abspath(path))
+    cache_dir = os.path.join(folder, CACHE_DIR)
+    tag = hashlib.sha1(repr((parser.__module__, parser.__name__, sorted(options.items()))).encode())
+    sidecar = f"{name}.{tag.hexdigest()[:12]}.npy"
+    sidecar_path = os.path.join(cache_dir, sidecar)
+    index_path = os.path.join(cache_dir, INDEX)
+
+    index = {}
+    if os.path.exists(index_path):
+        with open(index_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+    stat = os.stat(path)
+    entry = index.get(sidecar)
+    if entry and os.path.exists(sidecar_path):
+        if entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            return np.load(sidecar_path, mmap_mode="r")
+        if entry["size"] == stat.st_size and entry["sha1"] == _sha1(path):
+            # 只是时间变了 (如重新检出), 内容相同
+            entry["mtime_ns"] = stat.st_mtime_ns
+            _write_index(index_path, index)
+            return np.load(sidecar_path, mmap_mode="r")
+
+    data = np.asarray(parser(path, **options))
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = f"{sidecar_path}.{os.getpid()}.tmp.npy"  # 进程池里多个进程可能同时写同一目录
+    np.save(tmp, data)
+    os.replace(tmp, sidecar_path)
+    index[sidecar] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha1": _sha1(path)}
+    _write_index(index_path, index)
+    return np.load(sidecar_path, mmap_mode="r")
+
+
+def _write_index(index_path, index):
+    tmp = f"{index_path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=1)
+    os.replace(tmp, index_path)
@@ -2,7 +2,11 @@ import numpy as np
 import matplotlib.pyplot as plt
 from scipy.interpolate import make_interp_spline
 from matplotlib import font_manager as fm
-from scipy.signal import find_peaks
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from common.peak_fit import analyze
+from common.text_cache import load_text
 
 # ===== 1. 加载中文字体 =====
 font_path = '/System/Library/Fonts/STHeiti Medium.ttc'
@@ -10,7 +14,7 @@ my_font = fm.FontProperties(fname=font_path, size=16)
 
 # ===== 2. 读取数据 =====
 filename = "2300017787/Cs_single_spectrum.txt"
-data = np.loadtxt(filename, skiprows=1)
+data = load_text(filename, skiprows=1)
 E_g = data[:, 0]
 n = data[:, 1]
 
@@ -24,32 +28,32 @@ E_smooth = np.linspace(E_g.min(), E_g.max(), 500)
 spline = make_interp_spline(E_g, n, k=3)
 n_smooth = spline(E_smooth)
 
-# ===== 5. 找局部峰值（高度超过20%总峰值） =====
-peaks, _ = find_peaks(n_smooth)
-threshold = 0.25 * np.max(n_smooth)  # 高度阈值
-peaks = peaks[n_smooth[peaks] > threshold]  # 只保留高度超过阈值的峰
-peak_Es = E_smooth[peaks]
-peak_ns = n_smooth[peaks]
+# ===== 5. 自动寻峰并拟合 (高斯 + 线性本底, 直接用原始计数) =====
+# 阈值间隔 0.1 V, 峰宽约 2 个点; 只保留高度超过最高峰 25% 的峰
+# Ba 的 K X 射线峰 (~0.3 V) 只离扫描起点 3 个点, 默认的 2 sigma 端点截断会把它丢掉, 所以只去掉端点本身
+fit = analyze(n, x=E_g, sigma=2, edge=1)
+top = fit["baseline"] + fit["height"]  # 峰位处的总计数
+keep = top > 0.25 * top.max()
+peak_Es = fit["centroid"][keep]
+# 原来的结果有 X 射线峰 (~0.3 V)、背散射峰 (~2.05 V)、全能峰 (~6.88 V); 换了刻度或能谱时只提示, 不中断
+missing = [E for E in (0.3, 2.05, 6.88) if not np.any(np.abs(peak_Es - E) < 0.15)]
+if missing:
+    print("注意: 没有找到这些位置附近的峰: " + ", ".join(f"{E} V" for E in missing))
+peak_errs = fit["centroid_err"][keep]
+peak_ns = top[keep]
 
 # ===== 输出每个峰值 =====
 print("峰值列表 (E_g, n):")
-for E_peak, n_peak in zip(peak_Es, peak_ns):
-    print(f"{E_peak:.3f} V, {n_peak:.1f}")
+for E_peak, dE, n_peak in zip(peak_Es, peak_errs, peak_ns):
+    print(f"{E_peak:.3f} ± {dE:.3f} V, {n_peak:.1f}")
 
 # ===== 输出最后一个峰的半高全宽 (FWHM) =====
-last_peak_idx = peaks[-1]
-peak_height = n_smooth[last_peak_idx]
-half_height = peak_height / 2
-
-# 找左右半高点索引
-left_idx = np.where(n_smooth[:last_peak_idx] <= half_height)[0]
-left_idx = left_idx[-1] if len(left_idx) > 0 else 0
-
-right_idx = np.where(n_smooth[last_peak_idx:] <= half_height)[0]
-right_idx = right_idx[0] + last_peak_idx if len(right_idx) > 0 else len(n_smooth)-1
-
-FWHM = E_smooth[right_idx] - E_smooth[left_idx]
-print(f"\n最后一个峰半高全宽 FWHM: {FWHM:.3f} V")
+FWHM = fit["fwhm"][keep][-1]
+FWHM_err = fit["fwhm_err"][keep][-1]
+half_height = fit["baseline"][keep][-1] + fit["height"][keep][-1] / 2
+left_E = peak_Es[-1] - FWHM / 2
+right_E = peak_Es[-1] + FWHM / 2
+print(f"\n最后一个峰半高全宽 FWHM: {FWHM:.3f} ± {FWHM_err:.3f} V")
 
 # ===== 6. 绘图 =====
 plt.figure(figsize=(10, 6))
@@ -66,7 +70,7 @@ for x in peak_Es:
 
 # ===== 在绘图中画最后一个峰的FWHM =====
 # 半高水平线
-plt.hlines(half_height, E_smooth[left_idx]-0.5, E_smooth[right_idx]+0.5,
+plt.hlines(half_height, left_E-0.5, right_E+0.5,
            colors='green', linestyles='--', linewidth=2)
 
 # 坐标轴与标题（中文）
@@ -1,7 +1,12 @@
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib import font_manager as fm
-from scipy.stats import pearsonr
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from common.bootstrap import bootstrap_fit, line
+from common.calibration import calibrate_points
+from common.regression import fit_line
 
 # ===== 1. 加载中文字体 =====
 font_path = '/System/Library/Fonts/STHeiti Medium.ttc'  # macOS 系统字体
@@ -13,16 +18,24 @@ E_g = np.array([1.084, 3.569, 6.137, 6.956])   # 阈值电压 (V)
 E_gamma = np.array([0.184, 0.662, 1.173, 1.332])  # 光子能量 (MeV)
 
 # ===== 3. 拟合能量刻度关系 Eγ = G * Eg + E0 =====
-coeffs = np.polyfit(E_g, E_gamma, 1)
+# 刻度存在 common/.calibration 里, 其他脚本用同一个探测器名取到的是同一组系数
+calibration = calibrate_points("gamma_threshold", E_g, E_gamma)
+coeffs = calibration["coef"]
 G, E0 = coeffs
 E_fit = np.poly1d(coeffs)
 
 print(f"拟合结果：Eγ = {G:.4f} * Eg + {E0:.4f}")
 
 # ===== 4. 计算皮尔逊相关系数 r =====
-r, p_value = pearsonr(E_gamma, E_fit(E_g))
+fit = fit_line(E_g, E_gamma)
+r, p_value = fit["r"], fit["p"]
 print(f"皮尔逊相关系数 r^2 = {r**2:.6f}, p值 = {p_value:.4e}")
 
+# ===== 4.1 Bootstrap 95% 置信区间 =====
+boot = bootstrap_fit(line, E_g, E_gamma, [G, E0])
+(G_lo, E0_lo), (G_hi, E0_hi) = boot["percentiles"][[0, 2]]
+print(f"G 95% 区间 = [{G_lo:.4f}, {G_hi:.4f}] MeV/V, E0 95% 区间 = [{E0_lo:.4f}, {E0_hi:.4f}] MeV")
+
 # ===== 5. 生成拟合曲线 =====
 E_g_fit = np.linspace(min(E_g) - 0.2, max(E_g) + 0.2, 200)
 E_gamma_fit = E_fit(E_g_fit)
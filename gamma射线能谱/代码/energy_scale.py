@@ -1,8 +1,11 @@
 import numpy as np
 import matplotlib.pyplot as plt
 from scipy.interpolate import make_interp_spline
-from scipy.signal import find_peaks
 from matplotlib import font_manager as fm
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from common.peak_fit import fit_peaks
 
 # ===== 1. 中文字体 =====
 font_path = '/System/Library/Fonts/STHeiti Medium.ttc'
@@ -40,10 +43,15 @@ data_list = [
     }
 ]
 
+# ===== 2.1 四个峰一次拟合 (高斯 + 线性本底, 直接用测量点) =====
+# 每组 7 个点, 以计数最大的点为中心取窗口; 阈值等间隔, 结果由点序号换算成电压
+fits = fit_peaks([data['n'].astype(float) for data in data_list], range(len(data_list)),
+                 [np.argmax(data['n']) for data in data_list], sigma=1.5, half_width=3)
+
 # ===== 3. 绘图 =====
 plt.figure(figsize=(8, 6))
 
-for data in data_list:
+for i, data in enumerate(data_list):
     E_g = data['E_g']
     n = data['n']
 
@@ -65,14 +73,13 @@ for data in data_list:
     plt.plot(E_smooth, n_smooth, color=data['color_dark'], linewidth=2,
              label=data['label'])
 
-    # 找峰值并画灰色虚线，同时输出峰值坐标
-    peaks, _ = find_peaks(n_smooth)
-    if len(peaks) > 0:
-        peak_Es = E_smooth[peaks]
-        peak_ns = n_smooth[peaks]
-        for E_peak, n_peak in zip(peak_Es, peak_ns):
-            plt.axvline(x=E_peak, color='gray', linestyle='--', linewidth=1, alpha=1, dashes=(8, 6))
-            print(f"{data['label']} 峰值: E_g = {E_peak:.3f} V, n = {n_peak:.1f}")
+    # 拟合峰位画灰色虚线，同时输出峰值坐标
+    step = E_g[1] - E_g[0]
+    E_peak = E_g[0] + step * fits['centroid'][i]
+    dE_peak = step * fits['centroid_err'][i]
+    n_peak = fits['baseline'][i] + fits['height'][i]
+    plt.axvline(x=E_peak, color='gray', linestyle='--', linewidth=1, alpha=1, dashes=(8, 6))
+    print(f"{data['label']} 峰值: E_g = {E_peak:.3f} ± {dE_peak:.3f} V, n = {n_peak:.1f}")
 
 
 # 坐标轴与标题
@@ -0,0 +1,214 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# =========================
+# NaI(Tl) 闪烁谱仪能谱的蒙特卡罗模拟
+# 光子成批放在数组里一起输运, 每一轮: 抽自由程 -> 逃出晶体或相互作用
+#   光电吸收: 能量全部沉积
+#   康普顿散射: 按 Klein-Nishina 抽散射角 (与 compton_spectrum.py 同一截面), 沉积反冲电子能量
+# 反散射峰: 一部分光子先在源后方材料中大角度散射再进入晶体
+# 每个光子的沉积能量按 sigma = a * sqrt(E) 展宽, 再用能量刻度换成道址, 累加成 1024 道能谱
+# 大量光子分块模拟, 每块单独的随机数种子, 块之间用进程池并行, 内存只和块大小有关
+# =========================
+
+M_E_C2 = 510.999  # keV
+R_E = 2.8179403e-13  # 经典电子半径 (cm)
+N_A = 6.02214076e23
+
+# NaI: 密度 (g/cm^3), Z/A
+NAI_DENSITY = 3.667
+NAI_Z_OVER_A = (11 + 53) / (22.990 + 126.904)
+
+# NaI 光电吸收质量衰减系数 (cm^2/g), 取自 NIST XCOM 的近似值; 33.17 keV 为碘 K 吸收边
+_PHOTO_E = np.array([20, 33.16, 33.17, 40, 50, 60, 80, 100, 150, 200, 300, 400, 500, 600, 800,
+                     1000, 1250, 1500, 2000])
+_PHOTO_MU = np.array([18.9, 4.7, 27.0, 16.4, 9.3, 5.8, 2.7, 1.5, 0.49, 0.225, 0.074, 0.035,
+                      0.020, 0.0131, 0.0067, 0.0042, 0.0027, 0.0019, 0.0012])
+
+# 实测分辨率: Cs 662 keV、Co 1173/1332 keV 光电峰的 FWHM 都对应 a ≈ 0.95 sqrt(keV)
+RESOLUTION = 0.95
+
+SOURCES = {
+    # (能量 keV, 每次衰变的发射概率)
+    "Cs": [(661.657, 0.851), (32.06, 0.056), (36.4, 0.014)],
+    "Co": [(1173.228, 0.9985), (1332.492, 0.9998)],
+}
+
+
+def klein_nishina_total(E):
+    # 每个电子的 Klein-Nishina 总截面 (cm^2)
+    k = np.asarray(E, dtype=float) / M_E_C2
+    return 2 * np.pi * R_E**2 * (
+        (1 + k) / k**2 * (2 * (1 + k) / (1 + 2 * k) - np.log(1 + 2 * k) / k)
+        + np.log(1 + 2 * k) / (2 * k)
+        - (1 + 3 * k) / (1 + 2 * k)**2)
+
+
+def attenuation(E):
+    # 返回 (总线衰减系数 1/cm, 光电吸收所占比例)
+    compton = klein_nishina_total(E) * NAI_Z_OVER_A * N_A
+    photo = np.exp(np.interp(np.log(E), np.log(_PHOTO_E), np.log(_PHOTO_MU)))
+    mu = (compton + photo) * NAI_DENSITY
+    return mu, photo * NAI_DENSITY / mu
+
+
+def sample_compton(E, rng, min_cos=-1.0):
+    # Klein-Nishina 抽样 (Butcher-Messel 方法), 返回 (散射光子能量, cos theta)
+    # min_cos < -1 无效; 给定 min_cos 时只接受 cos theta <= min_cos (用于反散射)
+    k = E / M_E_C2
+    eps = np.empty_like(E)
+    cos = np.empty_like(E)
+    todo = np.arange(len(E))
+    while len(todo):
+        kt = k[todo]
+        eps0 = 1 / (1 + 2 * kt)
+        a1 = -np.log(eps0)
+        a2 = (1 - eps0**2) / 2
+        r1, r2, r3 = rng.random((3, len(todo)))
+        e = np.where(r1 * (a1 + a2) < a1, eps0**r2, np.sqrt(eps0**2 + (1 - eps0**2) * r2))
+        t = (1 - e) / (kt * e)
+        sin2 = np.maximum(t * (2 - t), 0)
+        accept = r3 <= 1 - e * sin2 / (1 + e**2)
+        if min_cos > -1:
+            accept &= (1 - t) <= min_cos
+        eps[todo[accept]] = e[accept]
+        cos[todo[accept]] = 1 - t[accept]
+        todo = todo[~accept]
+    return E * eps, cos
+
+
+def _rotate(u, cos, rng):
+    # 把方向 u (n, 3) 转过极角 arccos(cos), 方位角均匀
+    phi = 2 * np.pi * rng.random(len(u))
+    sin = np.sqrt(np.maximum(1 - cos**2, 0))
+    ux, uy, uz = u.T
+    perp = np.sqrt(np.maximum(1 - uz**2, 1e-12))
+    cp, sp = np.cos(phi), np.sin(phi)
+    new = np.empty_like(u)
+    new[:, 0] = ux * cos + sin * (ux * uz * cp - uy * sp) / perp
+    new[:, 1] = uy * cos + sin * (uy * uz * cp + ux * sp) / perp
+    new[:, 2] = uz * cos - sin * cp * perp
+    # 几乎沿 z 轴时上式退化, 直接用方位角
+    along = perp < 1e-6
+    new[along] = np.column_stack((sin * cp, sin * sp, cos * np.sign(uz)))[along]
+    return new
+
+
+def transport(E, radius, length, distance, rng):
+    # 点源位于晶体前表面轴线上 distance 处, 光子只在射向前表面的立体角内发射
+    # 晶体是半径 radius、长 length 的圆柱 (cm); 返回每个光子在晶体中沉积的总能量
+    n = len(E)
+    cos_max = distance / np.hypot(distance, radius)
+    w = cos_max + (1 - cos_max) * rng.random(n)
+    phi = 2 * np.pi * rng.random(n)
+    s = np.sqrt(1 - w**2)
+    u = np.column_stack((s * np.cos(phi), s * np.sin(phi), w))
+    pos = u * (distance / w)[:, None]
+    pos[:, 2] = 0.0
+
+    deposit = np.zeros(n)
+    alive = np.arange(n)
+    E = E.copy()
+    while len(alive):
+        mu, photo_fraction = attenuation(E[alive])
+        step = -np.log(rng.random(len(alive))) / mu
+        p = pos[alive] + u[alive] * step[:, None]
+        inside = (p[:, 2] >= 0) & (p[:, 2] <= length) & (p[:, 0]**2 + p[:, 1]**2 <= radius**2)
+        alive, p, photo_fraction = alive[inside], p[inside], photo_fraction[inside]
+        pos[alive] = p
+
+        photo = rng.random(len(alive)) < photo_fraction
+        deposit[alive[photo]] += E[alive[photo]]
+        alive = alive[~photo]
+        if not len(alive):
+            break
+        E_new, cos = sample_compton(E[alive], rng)
+        deposit[alive] += E[alive] - E_new
+        E[alive] = E_new
+        u[alive] = _rotate(u[alive], cos, rng)
+    return deposit
+
+
+def _simulate_chunk(args):
+    lines, n, calibration, n_channels, geometry, backscatter, seed = args
+    rng = np.random.default_rng(seed)
+    energies = np.array([e for e, _ in lines])
+    weights = np.array([w for _, w in lines])
+    E = energies[rng.choice(len(energies), size=n, p=weights / weights.sum())]
+
+    # 反散射: 这部分光子先在源后方材料里散射到 90 度以外再射向晶体
+    back = rng.random(n) < backscatter
+    if back.any():
+        E[back], _ = sample_compton(E[back], rng, min_cos=0.0)
+
+    deposit = transport(E, *geometry, rng)
+    hit = deposit > 0
+    smeared = deposit[hit] + RESOLUTION * np.sqrt(deposit[hit]) * rng.standard_normal(hit.sum())
+
+    k, b = calibration
+    channel = np.rint((smeared - b) / k).astype(int)  # 道址从 1 开始
+    channel = channel[(channel >= 1) & (channel <= n_channels)]
+    return np.bincount(channel - 1, minlength=n_channels)
+
+
+def simulate(source, n_photons, calibration, n_channels=1024, radius=2.5, length=5.0, distance=10.0,
+             backscatter=0.05, chunk_size=500_000, n_workers=None, seed=0):
+    # source: SOURCES 里的名字或 [(能量, 强度), ...]; calibration: (k, b), E = k * 道址 + b
+    # 返回长度 n_channels 的整数能谱; 各块的种子由 SeedSequence 派生, 结果与进程数无关
+    lines = SOURCES[source] if isinstance(source, str) else list(source)
+    sizes = [chunk_size] * (n_photons // chunk_size)
+    if n_photons % chunk_size:
+        sizes.append(n_photons % chunk_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    geometry = (radius, length, distance)
+    tasks = [(lines, n, tuple(calibration), n_channels, geometry, backscatter, s)
+             for n, s in zip(sizes, seeds)]
+
+    counts = np.zeros(n_channels, dtype=np.int64)
+    if n_workers == 1 or len(tasks) == 1:
+        for t in tasks:
+            counts += _simulate_chunk(t)
+    else:
+        with ProcessPoolExecutor(n_workers) as pool:
+            for hist in pool.map(_simulate_chunk, tasks):
+                counts += hist
+    return counts
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+    import matplotlib.pyplot as plt
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+    from common.calibration import calibrate_peaks
+    from common.text_cache import load_text
+
+    folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+    calibration = calibrate_peaks("gamma_mca", [
+        (os.path.join(folder, "2300017787_Cs_near.txt"), 661.660, 451),
+        (os.path.join(folder, "2300017787_Co_near.txt"), 1173.237, 787),
+        (os.path.join(folder, "2300017787_Co_near.txt"), 1332.501, 893),
+    ], sigma=12)
+
+    fig, axes = plt.subplots(1, 2, figsize=(14, 5))
+    for ax, name in zip(axes, ("Cs", "Co")):
+        t0 = time.perf_counter()
+        sim = simulate(name, 2_000_000, calibration["coef"])
+        dt = time.perf_counter() - t0
+        print(f"{name}: 2e6 photons in {dt:.2f} s ({2e6 / dt / 1e6:.2f} M photons/s)")
+
+        measured = load_text(os.path.join(folder, f"2300017787_{name}_near.txt"))
+        # 按光电峰附近的计数归一化
+        ref = slice(430, 470) if name == "Cs" else slice(770, 910)
+        scale = measured[ref].sum() / sim[ref].sum()
+        x = np.arange(1, len(sim) + 1)
+        ax.plot(np.arange(1, len(measured) + 1), measured, color="gray", linewidth=1, label="measured")
+        ax.plot(x, sim * scale, color="red", linewidth=1.5, label="Monte Carlo")
+        ax.set_xlabel("Channel", fontsize=14)
+        ax.set_ylabel("Counts", fontsize=14)
+        ax.set_title(f"{name} near", fontsize=14)
+        ax.legend(fontsize=12)
+    plt.tight_layout()
+    plt.show()
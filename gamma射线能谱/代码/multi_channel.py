@@ -2,6 +2,13 @@ import numpy as np
 import matplotlib.pyplot as plt
 from scipy.interpolate import make_interp_spline
 from matplotlib import font_manager as fm
+from mca_stream import SpectrumStream
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from common.peak_fit import analyze
+from common.calibration import calibrate_peaks, to_energy
+from common.text_cache import load_text
 
 # ===== 1. 中文字体 =====
 font_path = '/System/Library/Fonts/STHeiti Medium.ttc'
@@ -9,7 +16,7 @@ my_font = fm.FontProperties(fname=font_path, size=16)
 
 # ===== 2. 读取数据 =====
 filename = "2300017787/2300017787_Cs_Co_far.txt"   # ← 换成你的文件路径
-n = np.loadtxt(filename)                            # 文件只有一列：计数 n
+n = load_text(filename)                             # 文件只有一列：计数 n
 x = np.arange(1, len(n) + 1)                       # 道址 x = 1, 2, ..., 1024
 
 # ===== 3. 样条平滑拟合 =====
@@ -26,11 +33,12 @@ plt.scatter(x, n, color='#20B2AA', s=30, alpha=0.8, label='测量数据', zorder
 # 平滑曲线
 plt.plot(x_smooth, n_smooth, color='#007BA7', linewidth=2.2, label='拟合曲线')
 
-# ===== 5. 手动指定灰色虚线峰值 =====
-manual_peaks = [39, 148, 450, 793, 898]
+# ===== 5. 自动寻峰 (二阶导数信噪比), 峰位取高斯 + 线性本底拟合的质心 =====
+fit = analyze(n)
+auto_peaks = fit["centroid"]
 gray_ns = []
 
-for x_peak in manual_peaks:
+for x_peak in auto_peaks:
     plt.axvline(x=x_peak, color='gray', linestyle='--', linewidth=1, alpha=1, dashes=(8,6))
     # 插值获取对应的 n
     n_val = np.interp(x_peak, x_smooth, n_smooth)
@@ -38,8 +46,27 @@ for x_peak in manual_peaks:
 
 # 输出灰色虚线峰值及对应计数
 print("灰色虚线峰值及对应计数：")
-for i, (x_val, n_val) in enumerate(zip(manual_peaks, gray_ns), 1):
-    print(f"峰 {i}: x = {x_val}, n ≈ {n_val:.1f}")
+for i, (x_val, dx, w, n_val) in enumerate(zip(auto_peaks, fit["centroid_err"], fit["fwhm"], gray_ns), 1):
+    print(f"峰 {i}: x = {x_val:.1f} ± {dx:.1f}, FWHM = {w:.1f}, n ≈ {n_val:.1f}")
+
+# ===== 6. 能量刻度: 由近距离 Cs / Co 能谱的光电峰拟合, 结果缓存, 数据不变时不再重新拟合 =====
+folder = os.path.dirname(filename)
+calibration = calibrate_peaks("gamma_mca", [
+    (os.path.join(folder, "2300017787_Cs_near.txt"), 661.660, 451),
+    (os.path.join(folder, "2300017787_Co_near.txt"), 1173.237, 787),
+    (os.path.join(folder, "2300017787_Co_near.txt"), 1332.501, 893),
+], sigma=12)
+print(f"能量刻度：E = {calibration['coef'][0]:.4f} * x + {calibration['coef'][1]:.2f} keV")
+for i, E in enumerate(to_energy(calibration, auto_peaks), 1):
+    print(f"峰 {i}: E ≈ {E:.1f} keV")
+
+# 以拟合峰位为初值, 用扣本底后的质心和 FWHM 给出峰位 (实时采集时同样的对象可以边读边更新)
+stream = SpectrumStream(len(n), peaks=auto_peaks, calibration=calibration["coef"])
+stream.add_counts(n)
+tracked = stream.track()
+print("扣本底后的峰位与 FWHM：")
+for i, (c, w, E) in enumerate(zip(tracked["centroid"], tracked["fwhm"], tracked["energy"]), 1):
+    print(f"峰 {i}: 质心 = {c:.1f}, FWHM = {w:.1f}, E = {E:.1f} keV")
 
 # ===== 坐标轴与标题 =====
 plt.xlabel('道址 x', fontproperties=my_font, fontsize=18)
@@ -0,0 +1,133 @@
+import os
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy.optimize import nnls
+
+import gamma_mc
+
+# =========================
+# 全谱拟合 (响应矩阵解谱)
+# 响应矩阵 R[i, j]: 能量为 E_j 的一个入射光子在晶体中沉积能量落在第 i 个细能量格的概率,
+# 由 gamma_mc 的输运模拟 (Klein-Nishina 散射 + 光电吸收) 得到, 与能量刻度无关, 缓存在磁盘上
+# 使用时: 高斯展宽 (分辨率) -> 按刻度重新分到道 -> 非负最小二乘, 刻度或分辨率改了也只需重做这几步矩阵运算
+# 解出的是入射光子能谱: 光电峰对应的能量格之外, 反散射和 X 射线表现为低能处的入射强度
+# =========================
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".response_cache")
+
+ENERGIES = np.arange(20.0, 1501.0, 10.0)  # 入射光子能量 (keV)
+DEPOSIT_EDGES = np.arange(0.0, 1800.5, 0.5)  # 沉积能量细格边界 (keV)
+
+
+def _response_column(args):
+    E, n, geometry, seed = args
+    rng = np.random.default_rng(seed)
+    deposit = gamma_mc.transport(np.full(n, E), *geometry, rng)
+    return np.histogram(deposit[deposit > 0], bins=DEPOSIT_EDGES)[0] / n
+
+
+def response_matrix(energies=ENERGIES, n_photons=20000, radius=2.5, length=5.0, distance=10.0,
+                    seed=0, n_workers=None, cache_dir=CACHE_DIR):
+    # 返回 (n_细格, n_能量) 的未展宽响应矩阵; 参数不变时直接读缓存
+    energies = np.asarray(energies, dtype=float)
+    geometry = (radius, length, distance)
+    key = hashlib.sha1(repr((energies.tolist(), DEPOSIT_EDGES.tolist(), n_photons, geometry, seed,
+                             gamma_mc._PHOTO_MU.tolist())).encode()).hexdigest()
+    path = os.path.join(cache_dir, key + ".npy")
+    if os.path.exists(path):
+        return np.load(path)
+
+    seeds = np.random.SeedSequence(seed).spawn(len(energies))
+    tasks = [(E, n_photons, geometry, s) for E, s in zip(energies, seeds)]
+    with ProcessPoolExecutor(n_workers) as pool:
+        R = np.column_stack(list(pool.map(_response_column, tasks)))
+    os.makedirs(cache_dir, exist_ok=True)
+    np.save(path, R)
+    return R
+
+
+def smear(R, resolution=gamma_mc.RESOLUTION):
+    # 每个细格按 sigma = a * sqrt(E) 的高斯展开, S[i, k] 为细格 k 落到细格 i 的比例
+    centers = (DEPOSIT_EDGES[:-1] + DEPOSIT_EDGES[1:]) / 2
+    sigma = resolution * np.sqrt(centers)
+    z = (centers[:, None] - centers[None, :]) / sigma[None, :]
+    S = np.exp(-z**2 / 2) / sigma[None, :]
+    S /= S.sum(axis=0, keepdims=True)
+    return S @ R
+
+
+def to_channels(R, calibration, n_channels=1024):
+    # 细格按刻度重新分到道 (道址 c 覆盖能量 [k(c-0.5)+b, k(c+0.5)+b]), 用累积分布插值, 对所有列一次完成
+    k, b = calibration
+    cum = np.vstack((np.zeros(R.shape[1]), np.cumsum(R, axis=0)))
+    edges = k * (np.arange(1, n_channels + 2) - 0.5) + b
+    pos = np.clip(np.interp(edges, DEPOSIT_EDGES, np.arange(len(DEPOSIT_EDGES))), 0, len(DEPOSIT_EDGES) - 1)
+    i = np.minimum(pos.astype(int), len(DEPOSIT_EDGES) - 2)
+    frac = (pos - i)[:, None]
+    at_edges = cum[i] + frac * (cum[i + 1] - cum[i])
+    return np.diff(at_edges, axis=0)
+
+
+def unfold(counts, calibration, R=None, resolution=gamma_mc.RESOLUTION, fit_range=(30, 1000)):
+    # counts: 实测能谱 (道址从 1 开始); 返回入射能谱与拟合结果
+    counts = np.asarray(counts, dtype=float)
+    R = response_matrix() if R is None else R
+    A = to_channels(smear(R, resolution), calibration, len(counts))
+
+    lo, hi = fit_range
+    sel = slice(lo - 1, min(hi, len(counts)))
+    w = 1 / np.sqrt(np.maximum(counts[sel], 1))  # 泊松权重
+    flux, _ = nnls(A[sel] * w[:, None], counts[sel] * w)
+    model = A @ flux
+    dof = max(sel.stop - sel.start - np.count_nonzero(flux), 1)
+    return {
+        "energies": ENERGIES,
+        "flux": flux,  # 每个入射能量格的光子数
+        "model": model,
+        "chi2_red": float((((counts - model)[sel] * w)**2).sum() / dof),
+    }
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+    import matplotlib.pyplot as plt
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+    from common.calibration import calibrate_peaks
+    from common.text_cache import load_text
+
+    folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+    calibration = calibrate_peaks("gamma_mca", [
+        (os.path.join(folder, "2300017787_Cs_near.txt"), 661.660, 451),
+        (os.path.join(folder, "2300017787_Co_near.txt"), 1173.237, 787),
+        (os.path.join(folder, "2300017787_Co_near.txt"), 1332.501, 893),
+    ], sigma=12)
+
+    t0 = time.perf_counter()
+    R = response_matrix()
+    print(f"response matrix {R.shape}: {time.perf_counter() - t0:.1f} s")
+
+    fig, axes = plt.subplots(2, 2, figsize=(14, 8))
+    for col, name in enumerate(("Cs", "Co")):
+        counts = load_text(os.path.join(folder, f"2300017787_{name}_near.txt"))
+        t0 = time.perf_counter()
+        result = unfold(counts, calibration["coef"], R)
+        print(f"{name}_near: unfold {1e3 * (time.perf_counter() - t0):.0f} ms, chi2/dof = {result['chi2_red']:.2f}")
+        top = np.argsort(result["flux"])[::-1][:4]
+        for j in sorted(top):
+            print(f"  E = {ENERGIES[j]:6.0f} keV  {result['flux'][j]:10.0f} photons")
+
+        x = np.arange(1, len(counts) + 1)
+        axes[0, col].plot(x, counts, color="gray", linewidth=1, label="measured")
+        axes[0, col].plot(x, result["model"], color="red", linewidth=1.5, label="response fit")
+        axes[0, col].set_xlabel("Channel", fontsize=14)
+        axes[0, col].set_ylabel("Counts", fontsize=14)
+        axes[0, col].set_title(f"{name} near", fontsize=14)
+        axes[0, col].legend(fontsize=12)
+        axes[1, col].bar(ENERGIES, result["flux"], width=10, color="steelblue")
+        axes[1, col].set_xlabel("Incident energy (keV)", fontsize=14)
+        axes[1, col].set_ylabel("Photons", fontsize=14)
+    plt.tight_layout()
+    plt.show()
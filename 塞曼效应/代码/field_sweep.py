@@ -0,0 +1,159 @@
+import os
+import re
+import sys
+import glob
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from zeeman_orders import detect_peaks, order_period, group_orders, separations
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from common.text_cache import load_text
+
+# =========================
+# Zeeman field sweep
+# Every I_<current>A[_<polarization>].txt / .dat in a folder is loaded and analyzed
+# (peak detection -> order grouping, see zeeman_orders.py) in a worker process.
+# Results are cached per file under .zeeman_cache/, keyed by file content and
+# settings, so adding a new current only costs that file.
+# Shift of every sub-peak from the center of its order, in wavenumbers:
+#   dnu = dx / P * FSR,  FSR = 1 / (2 t)   (t: etalon spacing)
+# Adjacent components of the Hg 546.1 nm line are L / 2 apart,
+#   L = e B / (4 pi m c) = 0.46686 cm^-1 / T
+# so the comb spacing also gives the field seen by the lamp.
+# =========================
+
+CACHE_DIR = ".zeeman_cache"
+NAME_PATTERN = re.compile(r"I_([\d.]+)A(?:_(\w+))?\.(txt|dat)$")
+
+ETALON_SPACING = 0.2  # cm
+LORENTZ_UNIT = 0.46686  # cm^-1 / T
+
+
+def discover(folder="."):
+    # {(current, polarization): path}; the .dat export holds the same scan as the .txt, so .txt wins
+    files = {}
+    for path in sorted(glob.glob(os.path.join(folder, "I_*A*.*"))):
+        m = NAME_PATTERN.search(os.path.basename(path))
+        if m is None:
+            continue
+        key = (float(m.group(1)), m.group(2) or "")
+        if key not in files or m.group(3) == "txt":
+            files[key] = path
+    return dict(sorted(files.items()))
+
+
+def process_file(path, n_components=9, height=100):
+    # Without field there is no splitting, only one line per order
+    current = float(NAME_PATTERN.search(os.path.basename(path)).group(1))
+    n = 1 if current == 0 else n_components
+    data = load_text(path, min_cols=2)  # .dat files start with a few header lines
+    x, y = data[:, 0], data[:, 1]
+    x_peaks, y_peaks = detect_peaks(x, y, height=height)
+    groups = group_orders(x_peaks, y_peaks, order_period(x, y), n_components=n,
+                          x_range=(np.min(x), np.max(x)))
+    sep = separations(groups, ref=None)
+
+    fsr = 1 / (2 * ETALON_SPACING)
+    delta_nu = np.full(n_components, np.nan)
+    delta_nu_std = np.full(n_components, np.nan)
+    slots = slice(None) if n == n_components else slice((n_components - 1) // 2, (n_components - 1) // 2 + n)
+    delta_nu[slots] = sep["average"] / groups["period"] * fsr
+    delta_nu_std[slots] = sep["std"] / groups["period"] * fsr
+    spacing = groups["spacing"] / groups["period"] * fsr if n > 1 else np.nan
+    return {
+        "current": current,
+        "delta_nu": delta_nu,
+        "delta_nu_std": delta_nu_std,
+        "spacing": spacing,
+        "period": groups["period"],
+        "n_orders": int(groups["complete"].sum()),
+        "peaks": np.column_stack((x_peaks, y_peaks)),
+    }
+
+
+def _file_hash(path, settings):
+    h = hashlib.sha1(repr(sorted(settings.items())).encode())
+    with open(path, "rb") as f:
+        h.update(f.read())
+    return h.hexdigest()
+
+
+def _process_to_cache(path, cache_path, settings):
+    np.savez(cache_path, **process_file(path, **settings))
+    return cache_path
+
+
+def process_folder(folder=".", n_workers=None, **settings):
+    # {(current, polarization): result of process_file}; only new or changed files are analyzed
+    cache_dir = os.path.join(folder, CACHE_DIR)
+    os.makedirs(cache_dir, exist_ok=True)
+    files = discover(folder)
+    cache_paths = {p: os.path.join(cache_dir, _file_hash(p, settings) + ".npz") for p in files.values()}
+
+    todo = [p for p in files.values() if not os.path.exists(cache_paths[p])]
+    if n_workers == 1 or len(todo) == 1:
+        for p in todo:
+            _process_to_cache(p, cache_paths[p], settings)
+    elif todo:
+        with ProcessPoolExecutor(n_workers) as pool:
+            list(pool.map(_process_to_cache, todo, [cache_paths[p] for p in todo],
+                          [settings] * len(todo)))
+
+    results = {}
+    for key, p in files.items():
+        with np.load(cache_paths[p]) as d:
+            results[key] = {k: d[k][()] if d[k].ndim == 0 else d[k] for k in d.files}
+    return results
+
+
+def sweep_table(results, field=None):
+    # One row per scan, sorted by current:
+    #   current, polarization, B (from `field`, a {current: B in T} calibration; nan if not given),
+    #   B_splitting (field from the comb spacing), spacing (cm^-1 between adjacent components),
+    #   delta_nu, delta_nu_std ((rows, n_components), cm^-1 from the order center)
+    field = field or {}
+    keys = list(results)
+    spacing = np.array([results[k]["spacing"] for k in keys])
+    return {
+        "current": np.array([k[0] for k in keys]),
+        "polarization": np.array([k[1] for k in keys]),
+        "B": np.array([field.get(k[0], np.nan) for k in keys]),
+        "B_splitting": 2 * spacing / LORENTZ_UNIT,
+        "spacing": spacing,
+        "delta_nu": np.array([results[k]["delta_nu"] for k in keys]),
+        "delta_nu_std": np.array([results[k]["delta_nu_std"] for k in keys]),
+    }
+
+
+def sweep(folder=".", field=None, n_workers=None, **settings):
+    # The whole field sweep in one call: returns the table of sweep_table()
+    return sweep_table(process_folder(folder, n_workers, **settings), field)
+
+
+if __name__ == "__main__":
+    import matplotlib.pyplot as plt
+
+    folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+    table = sweep(folder)
+
+    print("I (A)  pol.    B_split (T)  spacing (cm^-1)   delta_nu of sub-peaks 1..9 (cm^-1)")
+    for i in range(len(table["current"])):
+        shifts = " ".join(f"{d:6.3f}" if np.isfinite(d) else "     -" for d in table["delta_nu"][i])
+        print(f"{table['current'][i]:5.1f}  {table['polarization'][i] or '-':6s}  {table['B_splitting'][i]:10.3f}"
+              f"  {table['spacing'][i]:15.4f}   {shifts}")
+
+    plt.figure(figsize=(8, 6))
+    unpolarized = table["polarization"] == ""
+    for j in range(table["delta_nu"].shape[1]):
+        plt.errorbar(table["current"][unpolarized], table["delta_nu"][unpolarized, j],
+                     yerr=table["delta_nu_std"][unpolarized, j], fmt="o-", capsize=4, label=f"n = {j + 1}")
+    plt.xlabel("Magnet current I (A)", fontsize=16)
+    plt.ylabel("Wavenumber Difference Δν̃ (cm⁻¹)", fontsize=16)
+    plt.xticks(fontsize=16)
+    plt.yticks(fontsize=16)
+    plt.legend(fontsize=10, ncol=3)
+    plt.tight_layout()
+    plt.show()
@@ -1,11 +1,15 @@
 import numpy as np
 import matplotlib.pyplot as plt
-from scipy.interpolate import make_interp_spline
 from scipy.signal import find_peaks
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from common.text_cache import load_text
+from zeeman_orders import refine_peaks
 
 # ----------- Read txt file -----------
 filename = "I_5A.txt"  # Replace with your filename
-data = np.loadtxt(filename)
+data = load_text(filename)
 x = data[:, 0]
 y = data[:, 1]
 
@@ -14,30 +18,28 @@ idx = np.argsort(x)
 x = x[idx]
 y = y[idx]
 
-# ----------- Smooth curve -----------
-x_smooth = np.linspace(x.min(), x.max(), 1000)
-spline = make_interp_spline(x, y, k=3)  # Cubic spline
-y_smooth = spline(x_smooth)
-
 # ----------- Find peaks (maxima only) -----------
 # Use height parameter to ensure only peaks above threshold are found
-peaks_idx, properties = find_peaks(y_smooth, height=100)  # height=100 ensures y>100
+peaks_idx, properties = find_peaks(y, height=100)  # height=100 ensures y>100
 
-x_peaks = x_smooth[peaks_idx]
-y_peaks = y_smooth[peaks_idx]
+# ----------- Sub-sample refinement -----------
+# Local fit to the raw samples around every maximum ("parabola", "gaussian" or "lorentzian")
+fit = refine_peaks(x, y, peaks_idx, half_width=8, model="gaussian")
+x_peaks = fit["center"]
+y_peaks = fit["height"]
+fwhm = fit["fwhm"]
 
 # Output coordinates
-print("Peak coordinates (x, y):")
-for i, (xp, yp) in enumerate(zip(x_peaks, y_peaks), start=1):
-    print(f"Peak {i}: ({xp:.2f}, {yp:.2f})")
+print("Peak coordinates (x, y) and FWHM:")
+for i, (xp, yp, w) in enumerate(zip(x_peaks, y_peaks, fwhm), start=1):
+    print(f"Peak {i}: ({xp:.2f}, {yp:.2f})  FWHM = {w:.2f}")
 
 print(f"\nTotal {len(x_peaks)} maxima found")
 
 # ----------- Plotting -----------
 plt.figure(figsize=(10, 6))
-plt.plot(x, y, 'o', alpha=0.3, label="Raw data", markersize=4)
-plt.plot(x_smooth, y_smooth, 'b-', label="Smooth curve", linewidth=1.5)
-plt.scatter(x_peaks, y_peaks, color='red', s=50, zorder=5, label="Detected maxima")
+plt.plot(x, y, 'b-', alpha=0.5, label="Raw data", linewidth=1)
+plt.scatter(x_peaks, y_peaks, color='red', s=50, zorder=5, label="Refined maxima")
 
 # Add labels to peaks
 for i, (xp, yp) in enumerate(zip(x_peaks, y_peaks), start=1):
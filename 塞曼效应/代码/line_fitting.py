@@ -1,26 +1,34 @@
 import numpy as np
 import matplotlib.pyplot as plt
-from scipy import stats
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from common.bootstrap import bootstrap_fit, line
+from common.regression import fit_line
+from field_sweep import sweep
+
+# Data: sub-peak shifts of one current from the field sweep table (see field_sweep.py, results are cached)
+current = 5.0  # Magnet current (A)
+# n_workers=1 here and in bootstrap_fit below: this script has no __main__ guard, so no worker processes
+table = sweep(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."), n_workers=1)
+row = np.flatnonzero((table["current"] == current) & (table["polarization"] == ""))[0]
+delta_nu = table["delta_nu"][row]  # Wavenumber difference (cm⁻¹)
+n = np.arange(1, len(delta_nu) + 1)  # Subpeak index
+print(f"I = {current} A, B from splitting = {table['B_splitting'][row]:.3f} T")
+
+# Linear regression with parameter uncertainties (common/regression.py)
+fit = fit_line(n, delta_nu)
+slope, intercept = fit["slope"], fit["intercept"]
+slope_std_error, intercept_std_error = fit["slope_err"], fit["intercept_err"]
+r_value, p_value = fit["r"], fit["p"]
+std_err = slope_std_error
 
-# Data
-n = np.array([1, 2, 3, 4, 5, 6, 7, 8, 9])  # Subpeak index
-delta_nu = np.array([-0.92, -0.67, -0.46, -0.24, 0.00, 0.22, 0.46, 0.68, 0.93])  # Wavenumber difference (cm⁻¹)
-
-# Linear regression
-slope, intercept, r_value, p_value, std_err = stats.linregress(n, delta_nu)
-
-# Calculate parameter uncertainties manually
 n_points = len(n)
 fitted_values = slope * n + intercept
 residuals = delta_nu - fitted_values
-RSS = np.sum(residuals**2)  # Residual sum of squares
-dof = n_points - 2  # Degrees of freedom
-
-# Standard errors for slope and intercept
-x_mean = np.mean(n)
-Sxx = np.sum((n - x_mean)**2)
-slope_std_error = np.sqrt(RSS / (dof * Sxx))
-intercept_std_error = np.sqrt(RSS / dof * (1/n_points + x_mean**2 / Sxx))
+RSS = fit["rss"]  # Residual sum of squares
+dof = fit["dof"]  # Degrees of freedom
+Sxx = fit["Sxx"]
 
 # Calculate fitted values
 n_fit = np.linspace(0.5, 9.5, 100)
@@ -44,14 +52,20 @@ print(f"Degrees of freedom: {dof}")
 print(f"Sxx: {Sxx:.6f}")
 
 # Confidence intervals (95% confidence level)
-t_value = stats.t.ppf(0.975, dof)  # Two-tailed t-value for 95% CI
-slope_CI = (slope - t_value * slope_std_error, slope + t_value * slope_std_error)
-intercept_CI = (intercept - t_value * intercept_std_error, intercept + t_value * intercept_std_error)
+slope_CI = fit["slope_ci"]
+intercept_CI = fit["intercept_ci"]
 
 print(f"\n95% Confidence Intervals:")
 print(f"Slope: [{slope_CI[0]:.6f}, {slope_CI[1]:.6f}] cm⁻¹/index")
 print(f"Intercept: [{intercept_CI[0]:.6f}, {intercept_CI[1]:.6f}] cm⁻¹")
 
+# Bootstrap confidence intervals (residual resampling)
+boot = bootstrap_fit(line, n, delta_nu, [slope, intercept], n_workers=1)
+(slope_lo, intercept_lo), (slope_hi, intercept_hi) = boot["percentiles"][[0, 2]]
+print(f"\nBootstrap 95% Confidence Intervals:")
+print(f"Slope: [{slope_lo:.6f}, {slope_hi:.6f}] cm⁻¹/index")
+print(f"Intercept: [{intercept_lo:.6f}, {intercept_hi:.6f}] cm⁻¹")
+
 # Plotting
 plt.figure(figsize=(8, 6))
 plt.scatter(n, delta_nu, color='black', s=50, label='Experimental data', zorder=5)
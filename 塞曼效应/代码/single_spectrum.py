@@ -1,10 +1,13 @@
 import numpy as np
 import matplotlib.pyplot as plt
-from scipy.interpolate import make_interp_spline
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from common.text_cache import load_text
 
 # ---------- 读取文件 ----------
 filename = "I_0A.txt"
-data = np.loadtxt(filename)
+data = load_text(filename)
 
 pressure = data[:, 0]
 intensity = data[:, 1]
@@ -14,18 +17,14 @@ idx = np.argsort(pressure)
 pressure = pressure[idx]
 intensity = intensity[idx]
 
-# ---------- 样条拟合 ----------
-pressure_dense = np.linspace(pressure.min(), pressure.max(), 1000)
-spline = make_interp_spline(pressure, intensity, k=3)
-intensity_smooth = spline(pressure_dense)
-
 # ---------- 绘图 ----------
 plt.figure(figsize=(12,6))
 
 # 散点图 (如需要)
 # plt.scatter(pressure, intensity, s=20, label='Raw Data')
 
-plt.plot(pressure_dense, intensity_smooth, color='#046B38', linestyle='-', linewidth=3, label='B=0.0 T')
+# 原始扫描约 3500 点, 比样条重采样的 1000 点更密, 直接连线
+plt.plot(pressure, intensity, color='#046B38', linestyle='-', linewidth=3, label='B=0.0 T')
 
 # ⬇⬇ 强制 x、y 轴从 0 开始 ⬇⬇
 plt.xlim(left=0, right=3800)
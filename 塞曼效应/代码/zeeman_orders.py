@@ -0,0 +1,288 @@
+import os
+import sys
+import glob
+
+import numpy as np
+from scipy.signal import find_peaks
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from common.text_cache import load_text
+
+# =========================
+# Fabry-Perot order / Zeeman sub-peak assignment
+# The scanned spectrum repeats every free spectral range P; inside one order the
+# Zeeman components sit on a comb x = center + j * d, j = -(n-1)/2 ... (n-1)/2.
+#   P      : autocorrelation of the spectrum (lag scored together with its double)
+#   center : mirror-symmetry center of the peak positions folded by P (the Zeeman
+#            pattern is symmetric about the unshifted line), snapped onto the comb
+#   d      : fundamental spacing of the folded offsets (largest s for which all
+#            offsets sit on one comb), refined by least squares after assignment
+# Each detected peak then gets an (order, slot); when several peaks fall into
+# the same slot (weak satellites, split maxima) the strongest one is kept.
+# Orders whose comb runs past the end of the scan are flagged incomplete.
+# =========================
+
+
+def refine_peaks(x, y, peaks, half_width=8, model="parabola"):
+    # Sub-sample position, height and FWHM of every peak from a local fit to the raw samples
+    # peaks[i] +- half_width, all windows solved together as one batch of 3x3 weighted least squares:
+    #   parabola   : y     = a + b t + c t^2
+    #   gaussian   : ln y  = a + b t + c t^2   (weights y^2, Caruana)
+    #   lorentzian : 1 / y = a + b t + c t^2   (weights y^4)
+    # A window without the right curvature keeps the raw maximum and gets a nan width
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    peaks = np.asarray(peaks, dtype=int)
+    idx = peaks[:, None] + np.arange(-half_width, half_width + 1)
+    inside = (idx >= 0) & (idx < len(x))
+    idx = np.clip(idx, 0, len(x) - 1)
+    t = x[idx] - x[peaks][:, None]
+    yw = np.maximum(y[idx], 1e-12)
+
+    if model == "parabola":
+        z, w = yw, np.ones_like(yw)
+    elif model == "gaussian":
+        z, w = np.log(yw), (yw / yw.max(axis=1, keepdims=True))**2
+    elif model == "lorentzian":
+        z, w = 1 / yw, (yw / yw.max(axis=1, keepdims=True))**4
+    else:
+        raise ValueError(f"unknown model: {model}")
+    w = w * inside
+
+    X = np.stack((np.ones_like(t), t, t**2), axis=-1)
+    Xw = X * w[..., None]
+    A = Xw.transpose(0, 2, 1) @ X
+    rhs = (Xw * z[..., None]).sum(axis=1)
+    a, b, c = np.linalg.solve(A + 1e-12 * np.eye(3), rhs[..., None])[..., 0].T
+
+    sign = 1 if model == "lorentzian" else -1
+    ok = (sign * c > 0) & (np.abs(b / (2 * c)) <= half_width * np.abs(t[:, -1] - t[:, 0]) / (2 * half_width))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        shift = np.where(ok, -b / (2 * c), 0.0)
+        top = a - b**2 / (4 * c)
+        if model == "parabola":
+            height = top
+            fwhm = 2 * np.sqrt(-top / (2 * c))
+        elif model == "gaussian":
+            height = np.exp(top)
+            fwhm = 2 * np.sqrt(2 * np.log(2)) * np.sqrt(-1 / (2 * c))
+        else:
+            height = 1 / top
+            fwhm = 2 * np.sqrt(top / c)
+    return {
+        "center": x[peaks] + shift,
+        "height": np.where(ok, height, y[peaks]),
+        "fwhm": np.where(ok, fwhm, np.nan),
+    }
+
+
+def detect_peaks(x, y, height=100, half_width=8, model="parabola"):
+    # Local maxima of the raw data above height, each refined to sub-sample precision
+    idx = np.argsort(x)
+    x, y = np.asarray(x)[idx], np.asarray(y)[idx]
+    peaks, _ = find_peaks(y, height=height)
+    fit = refine_peaks(x, y, peaks, half_width, model)
+    return fit["center"], fit["height"]
+
+
+def order_period(x, y, min_lag=None):
+    # Free spectral range from the autocorrelation of the spectrum on a unit grid
+    idx = np.argsort(x)
+    x, y = x[idx], y[idx]
+    grid = np.arange(x[0], x[-1])
+    s = np.interp(grid, x, y)
+    s = s - s.mean()
+    n = len(s)
+    f = np.fft.rfft(s, 2 * n)
+    ac = np.fft.irfft(f * np.conj(f))[:n]
+    ac /= ac[0]
+
+    lags, _ = find_peaks(ac[:n // 2])
+    if min_lag is not None:
+        lags = lags[lags >= min_lag]
+    # A sub-peak spacing also correlates well at lag d, but not at 2d as strongly as the true period at 2P
+    score = ac[lags] + ac[np.minimum(2 * lags, n - 1)]
+    lag = lags[np.argmax(score)]
+    # Parabolic refinement of the autocorrelation maximum
+    a, b, c = ac[lag - 1:lag + 2]
+    return (lag + 0.5 * (a - c) / (a - 2 * b + c)) * (grid[1] - grid[0])
+
+
+def _symmetry(x_peaks, y_peaks, period, c):
+    # sum_ij y_i y_j K(x_i + x_j - 2c) (mod P) for every candidate center c
+    pair = (x_peaks[:, None] + x_peaks[None, :]).ravel()
+    weight = (y_peaks[:, None] * y_peaks[None, :]).ravel()
+    r = (pair[None, :] - 2 * np.asarray(c)[:, None]) % period
+    r = np.minimum(r, period - r)
+    return (weight * np.exp(-0.5 * (r / (period / 100))**2)).sum(axis=1)
+
+
+def pattern_center(x_peaks, y_peaks, period, n_grid=2000):
+    # Mirror-symmetry center of the folded peak pattern. A periodic symmetric pattern is also
+    # symmetric half a period away, so c is only defined modulo P / 2; the caller picks between them
+    c = np.linspace(0, period / 2, n_grid, endpoint=False)
+    return c[np.argmax(_symmetry(x_peaks, y_peaks, period, c))]
+
+
+def _fold(x, center, period):
+    offset = x - center
+    return offset - np.round(offset / period) * period
+
+
+def _comb_fit(offsets, weights, s):
+    # Resultant of the offsets wrapped on a comb of spacing s: (quality in [0, 1], comb phase)
+    z = (weights * np.exp(2j * np.pi * offsets / np.asarray(s)[:, None])).sum(axis=1) / weights.sum()
+    return np.abs(z), np.angle(z) / (2 * np.pi) * s
+
+
+def comb_spacing(offsets, weights, n_components, period, n_grid=4000):
+    # Largest spacing s such that the offsets sit on a comb of spacing s; returns (s, comb phase)
+    s = np.linspace(period / (4 * n_components), period / max(n_components - 1, 1), n_grid)
+    quality, phase = _comb_fit(offsets, weights, s)
+    # Sub-harmonics d/2, d/3 ... fit as well as d itself, so take the largest s near the maximum
+    top = np.flatnonzero(quality >= 0.9 * quality.max())[-1]
+    lo, hi = max(top - n_grid // 100, 0), min(top + n_grid // 100, n_grid)
+    best = lo + np.argmax(quality[lo:hi])
+    return s[best], phase[best]
+
+
+def group_orders(x_peaks, y_peaks, period, n_components=9, spacing=None, x_range=None, n_iter=3):
+    # Returns a dict of (n_orders, n_components) arrays: x, y, index (into the peak list, -1 = empty slot),
+    # plus per-order center and a complete flag; slots are numbered 1..n_components from the left
+    x_peaks = np.asarray(x_peaks, dtype=float)
+    y_peaks = np.asarray(y_peaks, dtype=float)
+    half = (n_components - 1) / 2
+    fixed = spacing is not None
+
+    # Of the two symmetry centers, the strong lines cluster around the real one (the other lies in the
+    # gap between orders)
+    c0 = pattern_center(x_peaks, y_peaks, period)
+    spread = [np.sum(y_peaks * np.abs(_fold(x_peaks, c, period))) for c in (c0, c0 + period / 2)]
+    phase = c0 + period / 2 * np.argmin(spread)
+
+    if n_components == 1:
+        spacing = period / 2 if spacing is None else spacing
+    else:
+        # The center sits on a comb tooth; with slots missing the symmetry center can fall between
+        # two teeth, so snap to the most symmetric tooth next to it
+        offset = _fold(x_peaks, phase, period)
+        if fixed:
+            theta = _comb_fit(offset, y_peaks, [spacing])[1][0]
+        else:
+            spacing, theta = comb_spacing(offset, y_peaks, n_components, period)
+        teeth = phase + theta + spacing * np.arange(-1, 2)
+        teeth = teeth[np.abs(teeth - phase) <= 0.75 * spacing]
+        phase = teeth[np.argmax(_symmetry(x_peaks, y_peaks, period, teeth))]
+
+    order = np.round((x_peaks - phase) / period).astype(int)
+    orders = np.arange(order.min(), order.max() + 1)
+    center = phase + orders * period
+    for _ in range(n_iter):
+        # Assign every peak to the nearest order center, then to the nearest comb slot
+        k = np.clip(np.searchsorted((center[1:] + center[:-1]) / 2, x_peaks), 0, len(orders) - 1)
+        rel = (x_peaks - center[k]) / spacing
+        slot = np.round(rel).astype(int)
+        ok = (np.abs(rel - slot) < 0.5) & (np.abs(slot) <= half)
+
+        # Strongest peak per (order, slot)
+        cell = k * n_components + (slot + int(half))
+        best = np.full(len(orders) * n_components, -1)
+        candidates = np.flatnonzero(ok)
+        candidates = candidates[np.lexsort((y_peaks[candidates], cell[candidates]))]
+        best[cell[candidates]] = candidates  # later (stronger) peaks overwrite weaker ones
+        index = best.reshape(len(orders), n_components)
+
+        # Re-center every order on its assigned peaks (the period drifts slightly across the scan),
+        # then least-squares spacing over all orders
+        filled = index >= 0
+        j = np.arange(n_components) - half
+        shift = np.where(filled, x_peaks[index] - (center[:, None] + j * spacing), 0.0)
+        counts = filled.sum(axis=1)
+        center = center + np.where(counts > 0, shift.sum(axis=1) / np.maximum(counts, 1), 0.0)
+        if not fixed and n_components > 1:
+            jj = np.where(filled, j, 0.0)
+            spacing = np.sum(np.where(filled, x_peaks[index] - center[:, None], 0.0) * jj) / np.sum(jj**2)
+
+    filled = index >= 0
+    x = np.where(filled, x_peaks[index], np.nan)
+    y = np.where(filled, y_peaks[index], np.nan)
+    lo, hi = (x_peaks.min(), x_peaks.max()) if x_range is None else x_range
+    complete = (center - half * spacing - spacing / 2 >= lo) & (center + half * spacing + spacing / 2 <= hi)
+    return {
+        "x": x,
+        "y": y,
+        "index": index,
+        "center": center,
+        "complete": complete,
+        "period": period,
+        "spacing": spacing,
+    }
+
+
+def _nan_stats(a):
+    # Column mean and standard deviation ignoring empty slots (all-empty columns give nan, silently)
+    n = (~np.isnan(a)).sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.nansum(a, axis=0) / n
+        std = np.sqrt(np.nansum((a - mean)**2, axis=0) / n)
+    return mean, std
+
+
+def separations(groups, ref=5, complete_only=True):
+    # Position of every sub-peak relative to sub-peak `ref` of the same order
+    # (ref=None: relative to the fitted comb center, for patterns without a central line)
+    keep = groups["complete"] if complete_only else np.ones(len(groups["x"]), dtype=bool)
+    x = groups["x"][keep]
+    diff = x - (groups["center"][keep, None] if ref is None else x[:, ref - 1:ref])
+    average, std = _nan_stats(diff)
+    return {"values": diff, "average": average, "std": std}
+
+
+def intensities(groups, background=0.0, ref=5, ref_value=4.0, complete_only=True):
+    # Background-subtracted intensities scaled so that sub-peak `ref` averages to ref_value
+    y = groups["y"][groups["complete"]] if complete_only else groups["y"]
+    corrected = y - background
+    factor = ref_value / _nan_stats(corrected)[0][ref - 1]
+    normalized = corrected * factor
+    average, std = _nan_stats(normalized)
+    return {
+        "original": y,
+        "corrected": corrected,
+        "normalized": normalized,
+        "factor": factor,
+        "average": average,
+        "std": std,
+    }
+
+
+def analyze(x, y, n_components=9, height=100, background=0.0, ref=5, ref_value=4.0):
+    # Peak detection, order grouping, separations and normalized intensities for one spectrum
+    x_peaks, y_peaks = detect_peaks(x, y, height=height)
+    groups = group_orders(x_peaks, y_peaks, order_period(x, y), n_components=n_components,
+                          x_range=(np.min(x), np.max(x)))
+    return {
+        "peaks": (x_peaks, y_peaks),
+        "groups": groups,
+        "separations": separations(groups, ref),
+        "intensities": intensities(groups, background, ref, ref_value),
+    }
+
+
+def analyze_files(pattern="I_*A.txt", load=load_text, **options):
+    # Runs analyze() on every file matching pattern; returns {filename: result}
+    results = {}
+    for path in sorted(glob.glob(pattern)):
+        data = load(path)
+        results[path] = analyze(data[:, 0], data[:, 1], **options)
+    return results
+
+
+if __name__ == "__main__":
+    folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+    # I_0A has no Zeeman splitting, only the field-on scans are grouped into 9 sub-peaks
+    for path, result in analyze_files(os.path.join(folder, "I_[!0]*A.txt"), background=48).items():
+        groups = result["groups"]
+        print(f"{os.path.basename(path)}: P = {groups['period']:.1f}, d = {groups['spacing']:.2f}, "
+              f"{groups['complete'].sum()} complete orders")
+        for k in np.flatnonzero(groups["complete"]):
+            print("   ", " ".join(f"{i + 1:3d}" if i >= 0 else "  -" for i in groups["index"][k]))
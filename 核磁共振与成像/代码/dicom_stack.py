@@ -0,0 +1,187 @@
+import os
+import re
+import glob
+import mmap
+import struct
+from collections import OrderedDict
+
+import numpy as np
+
+# =========================
+# Sampling.N.dcm 序列的延迟加载
+# 建索引时只解析头部, 记下像素数据的位置; 某一层被索引时才解码,
+# 解码结果放在预先分配的连续缓存里, 按 LRU 淘汰
+# 注意: 这些文件的 Instance Number / Slice Location 是占位字符串, 层序取文件名中的 N
+# =========================
+
+EXPLICIT_VR_LE = "1.2.840.10008.1.2.1"
+IMPLICIT_VR_LE = "1.2.840.10008.1.2"
+
+# 显式 VR 中长度字段为 4 字节的 VR
+_LONG_VR = {b"OB", b"OD", b"OF", b"OL", b"OV", b"OW", b"SQ", b"SV", b"UC", b"UN", b"UR", b"UT", b"UV"}
+_UNDEFINED = 0xFFFFFFFF
+_ITEM = (0xFFFE, 0xE000)
+_ITEM_END = (0xFFFE, 0xE00D)
+_SEQ_END = (0xFFFE, 0xE0DD)
+_PIXEL_DATA = (0x7FE0, 0x0010)
+
+# 需要的头部字段: tag -> (名称, 类型)
+_TAGS = {
+    (0x0002, 0x0010): ("transfer_syntax", str),
+    (0x0018, 0x0050): ("slice_thickness", float),
+    (0x0018, 0x0080): ("repetition_time", float),
+    (0x0018, 0x0081): ("echo_time", float),
+    (0x0028, 0x0010): ("rows", "H"),
+    (0x0028, 0x0011): ("columns", "H"),
+    (0x0028, 0x0100): ("bits_allocated", "H"),
+    (0x0028, 0x0103): ("pixel_representation", "H"),
+    (0x0028, 0x1052): ("rescale_intercept", float),
+    (0x0028, 0x1053): ("rescale_slope", float),
+}
+
+
+def _element(buf, pos, explicit):
+    # 返回 (tag, 值起始位置, 值长度)
+    group, elem = struct.unpack_from("<HH", buf, pos)
+    if group == 0xFFFE or not explicit:
+        return (group, elem), pos + 8, struct.unpack_from("<I", buf, pos + 4)[0]
+    vr = buf[pos + 4:pos + 6]
+    if vr in _LONG_VR:
+        return (group, elem), pos + 12, struct.unpack_from("<I", buf, pos + 8)[0]
+    return (group, elem), pos + 8, struct.unpack_from("<H", buf, pos + 6)[0]
+
+
+def _skip_undefined(buf, pos, explicit):
+    # 跳过长度未定义的序列, 返回序列结束后的位置
+    while True:
+        tag, start, length = _element(buf, pos, explicit)
+        if tag == _SEQ_END:
+            return start
+        if tag == _ITEM and length == _UNDEFINED:
+            pos = start
+            while True:
+                tag, start, length = _element(buf, pos, explicit)
+                if tag == _ITEM_END:
+                    pos = start
+                    break
+                pos = _skip_undefined(buf, start, explicit) if length == _UNDEFINED else start + length
+        else:
+            pos = start + length
+
+
+def _decode(raw, kind):
+    if kind is str:
+        return raw.decode("ascii", errors="replace").strip("\x00 ")
+    if kind is float:
+        try:
+            return float(raw.decode("ascii").strip("\x00 ").split("\\")[0])
+        except ValueError:
+            return None
+    return struct.unpack("<" + kind, raw)[0]
+
+
+def read_header(path):
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        if buf[128:132] != b"DICM":
+            raise ValueError(f"{path}: not a DICOM part 10 file")
+        header = {"path": path, "rescale_slope": 1.0, "rescale_intercept": 0.0}
+        pos = 132
+        explicit = True
+        while pos < len(buf):
+            # 文件元信息 (0002 组) 总是显式 VR, 之后按传输语法
+            group = struct.unpack_from("<H", buf, pos)[0]
+            if group != 0x0002:
+                explicit = header.get("transfer_syntax", EXPLICIT_VR_LE) != IMPLICIT_VR_LE
+            tag, start, length = _element(buf, pos, explicit or group == 0x0002)
+            if tag == _PIXEL_DATA:
+                header["pixel_offset"] = start
+                header["pixel_length"] = length
+                break
+            if length == _UNDEFINED:
+                pos = _skip_undefined(buf, start, explicit)
+                continue
+            if tag in _TAGS:
+                name, kind = _TAGS[tag]
+                value = _decode(buf[start:start + length], kind)
+                if value is not None:
+                    header[name] = value
+            pos = start + length
+
+    if "pixel_offset" not in header:
+        raise ValueError(f"{path}: no pixel data")
+    sign = "i" if header.get("pixel_representation", 0) else "u"
+    header["dtype"] = np.dtype(f"<{sign}{header['bits_allocated'] // 8}")
+    return header
+
+
+def index_series(folder):
+    # 按文件名中的序号排序, 只读头部
+    def number(path):
+        match = re.search(r"\.(\d+)\.dcm$", path)
+        return int(match.group(1)) if match else 0
+    return [read_header(p) for p in sorted(glob.glob(os.path.join(folder, "*.dcm")), key=number)]
+
+
+class DicomVolume:
+    # 三维体数据 (slices, rows, columns), 按层延迟解码
+
+    def __init__(self, folder, cache_size=8):
+        self.headers = index_series(folder)
+        if not self.headers:
+            raise ValueError(f"{folder}: no .dcm files")
+        first = self.headers[0]
+        self.shape = (len(self.headers), first["rows"], first["columns"])
+        self.dtype = np.dtype(np.float32)
+        # 预分配的解码缓存, 每个槽位放一层
+        self._cache = np.empty((min(cache_size, len(self.headers)),) + self.shape[1:], dtype=self.dtype)
+        self._slots = OrderedDict()  # 层号 -> 槽位, 最近使用的在末尾
+
+    def __len__(self):
+        return self.shape[0]
+
+    def _slot(self, i):
+        if i in self._slots:
+            self._slots.move_to_end(i)
+            return self._slots[i]
+        if len(self._slots) < len(self._cache):
+            slot = len(self._slots)
+        else:
+            _, slot = self._slots.popitem(last=False)
+        h = self.headers[i]
+        count = self.shape[1] * self.shape[2]
+        with open(h["path"], "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            pixels = np.frombuffer(buf, dtype=h["dtype"], count=count, offset=h["pixel_offset"])
+            np.multiply(pixels.reshape(self.shape[1:]), h["rescale_slope"], out=self._cache[slot])
+            del pixels  # 关闭 mmap 前释放对它的引用
+        self._cache[slot] += h["rescale_intercept"]
+        self._slots[i] = slot
+        return slot
+
+    def __getitem__(self, key):
+        # 第一维是层号, 其余维度按普通 numpy 索引处理
+        index, rest = (key[0], key[1:]) if isinstance(key, tuple) else (key, ())
+        if isinstance(index, (int, np.integer)):
+            index = range(len(self))[index]
+            return self._cache[self._slot(index)][rest].copy()
+        indices = np.arange(len(self))[index].ravel()
+        out = np.empty((len(indices),) + self.shape[1:], dtype=self.dtype)
+        for j, i in enumerate(indices):
+            out[j] = self._cache[self._slot(int(i))]
+        return out[(slice(None),) + rest]
+
+
+if __name__ == "__main__":
+    import matplotlib.pyplot as plt
+
+    root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+    volume = DicomVolume(os.path.join(root, "三角柱", "Sampling"))
+    print(f"volume shape = {volume.shape}, TE = {volume.headers[0]['echo_time']} ms, "
+          f"TR = {volume.headers[0]['repetition_time']} ms")
+
+    fig, axes = plt.subplots(1, len(volume), figsize=(3 * len(volume), 3))
+    for i, ax in enumerate(np.atleast_1d(axes)):
+        ax.imshow(volume[i], cmap="gray")
+        ax.set_title(f"Sampling.{i + 1}.dcm", fontsize=10)
+        ax.axis("off")
+    plt.tight_layout()
+    plt.show()
@@ -0,0 +1,123 @@
+import os
+
+import numpy as np
+import scipy.fft
+from scipy import ndimage
+
+from nmr_raw import load_sampling
+
+# =========================
+# 由 Sampling.fid 的 k 空间数据重建图像
+# 切趾 -> 零填充 -> 零阶相位校正 -> 批量二维 FFT (所有层一次完成)
+# k 空间形状 (slices, views, points), 输出 (slices, ny, nx)
+# =========================
+
+WINDOWS = {
+    None: lambda n: np.ones(n),
+    "hann": np.hanning,
+    "hamming": np.hamming,
+    "blackman": np.blackman,
+}
+
+
+def echo_center(kspace):
+    # 每层 k 空间幅值最大处 (回波中心) 的 (view, 采样点) 下标, 形状 (slices, 2)
+    # 回波不在数组中间: 这些数据大约在 view 95 / 192, 采样点 55 / 256
+    flat = np.abs(kspace).reshape(kspace.shape[0], -1)
+    return np.column_stack(np.unravel_index(np.argmax(flat, axis=1), kspace.shape[-2:]))
+
+
+def _echo_window(n, center, window):
+    # 长度 n、最大值在 center 的窗: 左边取 2*center+1 点窗的左半, 右边取 2*(n-1-center)+1 点窗的右半,
+    # 两端都降到窗的边缘值
+    m = n - 1 - center
+    return np.concatenate((WINDOWS[window](2 * center + 1)[:center + 1], WINDOWS[window](2 * m + 1)[m + 1:]))
+
+
+def apodize(kspace, window="hann"):
+    # 二维可分离窗, 抑制截断引起的振铃; 窗的中心放在每层的回波中心上
+    ny, nx = kspace.shape[-2:]
+    out = np.empty_like(kspace)
+    for i, (cy, cx) in enumerate(echo_center(kspace)):
+        out[i] = kspace[i] * np.outer(_echo_window(ny, cy, window), _echo_window(nx, cx, window))
+    return out
+
+
+def zero_fill(kspace, shape):
+    # 在 k 空间四周补零到 shape, 原数据居中
+    ny, nx = kspace.shape[-2:]
+    py, px = shape[0] - ny, shape[1] - nx
+    pad = [(0, 0)] * (kspace.ndim - 2) + [(py // 2, py - py // 2), (px // 2, px - px // 2)]
+    return np.pad(kspace, pad)
+
+
+def phase_correct(kspace):
+    # 零阶相位: 每层以 k 空间最大值 (回波中心) 的相位为零
+    cy, cx = echo_center(kspace).T
+    peak = kspace[np.arange(len(kspace)), cy, cx]
+    return kspace * np.exp(-1j * np.angle(peak))[:, None, None]
+
+
+def reconstruct(kspace, window=None, shape=(256, 256), phase=True,
+                magnitude=True, workers=None):
+    # 默认参数 (不加窗, 零填充到 256x256) 的结果与扫描仪导出的 Sampling.N.dcm 的相关系数为 0.9996 ~ 0.99999
+    # (三个样品的每一层); 加窗会去掉 DICOM 里的像素级噪声, 逐像素的相关系数因此只有 0.4 ~ 0.96,
+    # 比较结构时两边先做同样的平滑, 见 compare_dicom
+    # workers 传给 scipy.fft, 为 -1 时使用全部 CPU 核
+    k = np.asarray(kspace, dtype=np.complex64)
+    if k.ndim == 2:
+        k = k[None]
+    if window:
+        k = apodize(k, window)
+    if shape is not None:
+        k = zero_fill(k, shape)
+    if phase:
+        k = phase_correct(k)
+    image = scipy.fft.fftshift(
+        scipy.fft.ifft2(scipy.fft.ifftshift(k, axes=(-2, -1)), workers=workers),
+        axes=(-2, -1))
+    # 与扫描仪导出的 DICOM 方向一致 (绕中心上下左右都翻转)
+    image = np.roll(image[..., ::-1, ::-1], 1, axis=(-2, -1))
+    return np.abs(image) if magnitude else image
+
+
+def compare_dicom(image, dicom, smooth=3):
+    # 每层与 DICOM 的相关系数: (逐像素, 两边都做 sigma = smooth 像素的高斯平滑后)
+    raw = [np.corrcoef(a.ravel(), b.ravel())[0, 1] for a, b in zip(image, dicom)]
+    smoothed = [np.corrcoef(ndimage.gaussian_filter(a, smooth).ravel(),
+                            ndimage.gaussian_filter(b, smooth).ravel())[0, 1] for a, b in zip(image, dicom)]
+    return np.array(raw), np.array(smoothed)
+
+
+if __name__ == "__main__":
+    import matplotlib.pyplot as plt
+    from dicom_stack import DicomVolume
+
+    root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+    samples = ("三角柱", "0.5_in_2", "纯cuso4_0.1")
+    images = {s: reconstruct(load_sampling(os.path.join(root, s, "Sampling"))["kspace"], workers=-1)
+              for s in samples}
+
+    # 加窗重建仍应与扫描仪的图像一致 (平滑后相关系数 > 0.9)
+    for s in samples:
+        folder = os.path.join(root, s, "Sampling")
+        dicom = DicomVolume(folder)[:]
+        for window in WINDOWS:
+            image = reconstruct(load_sampling(folder)["kspace"], window=window, workers=-1)
+            raw, smoothed = compare_dicom(image, dicom)
+            print(f"{s:12s} {str(window):9s} r = {raw.min():.5f} ~ {raw.max():.5f}, "
+                  f"smoothed r = {smoothed.min():.4f} ~ {smoothed.max():.4f}")
+            if smoothed.min() < 0.9:
+                print(f"  警告: {s} 加 {window} 窗后与 Sampling.N.dcm 不一致")
+
+    n_cols = max(len(v) for v in images.values())
+    fig, axes = plt.subplots(len(samples), n_cols, figsize=(3 * n_cols, 3 * len(samples)), squeeze=False)
+    for row, s in enumerate(samples):
+        for col in range(n_cols):
+            ax = axes[row, col]
+            ax.axis("off")
+            if col < len(images[s]):
+                ax.imshow(images[s][col], cmap="gray")
+                ax.set_title(f"{s} slice {col + 1}", fontsize=10)
+    plt.tight_layout()
+    plt.show()
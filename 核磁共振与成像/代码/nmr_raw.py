@@ -0,0 +1,129 @@
+import os
+import re
+import json
+import struct
+
+import numpy as np
+
+# =========================
+# 核磁共振原始数据读取 (.fid / .scout / .sf / .shm / .rfa / .rfpw / .scan)
+# 数据块: float32 实部虚部交替, 直接映射为 complex64, 不做逐点解包
+# 数据块前 16 字节是 4 个 int32: 采样点数, 相位编码数, 层数, 1
+#   Sampling.fid / .scout: 文件开头就是数据块头, 数据从第 440 字节开始
+#   FID_*.fid / SE.fid:    前面多一段序列程序, 偏移量 4 处记录参数区位置,
+#                          参数区之后固定 3149 字节开始数据 (对比本目录文件得到)
+# =========================
+
+SAMPLING_DATA_OFFSET = 440
+SEQUENCE_FORMAT = 201
+SEQUENCE_PARAM_TO_DATA = 3149
+
+
+def _read_pascal(buf, pos):
+    n = buf[pos]
+    return buf[pos + 1:pos + 1 + n].decode("ascii", errors="replace")
+
+
+def read_fid_header(path):
+    with open(path, "rb") as f:
+        head = f.read(512)
+    header = {"path": path}
+    fmt = struct.unpack_from("<i", head, 0)[0]
+    if fmt == SEQUENCE_FORMAT:
+        # 序列名 (如 "SpinEcho1") 与日期都是 Pascal 字符串
+        param_offset = struct.unpack_from("<i", head, 4)[0]
+        header["sequence"] = _read_pascal(head, 0x1c)
+        header["date"] = _read_pascal(head, 0x5a)
+        header["param_offset"] = param_offset
+        data_offset = param_offset + SEQUENCE_PARAM_TO_DATA
+    else:
+        header["sequence"] = None
+        data_offset = SAMPLING_DATA_OFFSET
+
+    with open(path, "rb") as f:
+        f.seek(data_offset - 16)
+        points, views, slices, _ = struct.unpack("<4i", f.read(16))
+    header.update(points=points, views=views, slices=slices, data_offset=data_offset)
+
+    expected = data_offset + 8 * points * views * slices
+    if expected != os.path.getsize(path):
+        raise ValueError(f"{path}: header says {expected} bytes, file has {os.path.getsize(path)}")
+    return header
+
+
+def read_fid(path):
+    # 返回 (header, 数据), 数据形状 (slices, views, points); 单个 FID 时为 (points,)
+    header = read_fid_header(path)
+    shape = (header["slices"], header["views"], header["points"])
+    if header["slices"] == header["views"] == 1:
+        shape = (header["points"],)
+    data = np.memmap(path, dtype="<c8", mode="r", offset=header["data_offset"], shape=shape)
+    return header, data
+
+
+def read_curve(path):
+    # .sf / .shm / .rfa / .rfpw: float32 起点, float32 步长, int32 点数, 之后是 float32 数组
+    with open(path, "rb") as f:
+        buf = f.read()
+    start, step, n = struct.unpack_from("<ffi", buf, 0)
+    y = np.frombuffer(buf, dtype="<f4", count=n, offset=12)
+    return start + step * np.arange(n), y
+
+
+def _parse_value(text):
+    text = text.strip()
+    if text.startswith('"') and text.endswith('"'):
+        return text[1:-1]
+    if text.startswith("["):
+        # 数组和 GradMatrixList 都是合法 JSON
+        try:
+            value = json.loads(text)
+        except ValueError:
+            return text
+        if value and all(isinstance(v, (int, float)) for v in value):
+            return np.array(value, dtype=float)
+        return value
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    try:
+        return float(text)
+    except ValueError:
+        return text
+
+
+def read_scan(path):
+    # .scan: 每行 "Key = value;", 返回 {Key: value}
+    params = {}
+    with open(path, "r", encoding="gbk", errors="replace") as f:
+        for line in f:
+            match = re.match(r"\s*([^=]+?)\s*=\s*(.*);\s*$", line)
+            if match:
+                params[match.group(1)] = _parse_value(match.group(2))
+    return params
+
+
+def load_sampling(folder):
+    # 一次读取 Sampling/ 目录下的全部文件
+    base = os.path.join(folder, "Sampling")
+    result = {"scan": read_scan(base + ".scan")}
+    result["fid_header"], result["kspace"] = read_fid(base + ".fid")
+    if os.path.exists(base + ".scout"):
+        result["scout_header"], result["scout"] = read_fid(base + ".scout")
+    for ext in ("sf", "shm", "rfa", "rfpw"):
+        if os.path.exists(base + "." + ext):
+            result[ext] = read_curve(base + "." + ext)
+    return result
+
+
+if __name__ == "__main__":
+    root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+    for name in ("FID_before.fid", "FID_after.fid", "SE.fid"):
+        header, data = read_fid(os.path.join(root, name))
+        print(f"{name}: {header['sequence']} {header['date']}, {data.shape} complex, "
+              f"|s|max = {np.abs(data).max():.1f}")
+    for sample in ("三角柱", "0.5_in_2", "纯cuso4_0.1"):
+        d = load_sampling(os.path.join(root, sample, "Sampling"))
+        print(f"{sample}: k-space {d['kspace'].shape}, scout {d['scout'].shape}, "
+              f"{d['scan']['Sequence']}, TE = {d['scan']['TE']} ms, TR = {d['scan']['TR']} ms")
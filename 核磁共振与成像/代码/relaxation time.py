@@ -1,9 +1,13 @@
 import numpy as np
 import matplotlib.pyplot as plt
 from scipy.interpolate import make_interp_spline
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from common.text_cache import load_text
 
 def load_txt(filename):
-    data = np.loadtxt(filename)
+    data = load_text(filename)
     t = data[:, 0]
     s = data[:, 1]
 
@@ -19,12 +23,29 @@ t1, s1 = load_txt("cuso4_0.5_T1.txt")
 t2, s2 = load_txt("cuso4_0.5_T2.txt")
 
 # --- 平滑处理 ---
-def smooth_curve(x, y):
+def smooth_curve(x, y, log=True, tol=5e-4, n_start=64, max_depth=12):
     # x 和 y 已经在 load_txt 中排好序，这里可不再排序
+    # 自适应采样: 先在 (对数) 横轴上均匀取 n_start 个点, 再在每个区间中点检查
+    # 样条值与折线的偏差, 超过 tol (相对纵轴范围, 5e-4 约为 600 像素高图中的三分之一像素) 就插入中点
+    # 曲率大的地方点密, 平坦处点疏, 一般几百个点即可与 1000000 点的曲线重合
     spline = make_interp_spline(x, y, k=3)
-    x_new = np.linspace(x.min(), x.max(), 1000000)
-    y_new = spline(x_new)
-    return x_new, y_new
+    u = np.linspace(np.log10(x.min()), np.log10(x.max()), n_start) if log \
+        else np.linspace(x.min(), x.max(), n_start)
+    to_x = (lambda v: 10**v) if log else (lambda v: v)
+    v = spline(to_x(u))
+    y_range = np.ptp(y) or 1.0
+
+    for _ in range(max_depth):
+        u_mid = (u[:-1] + u[1:]) / 2
+        v_mid = spline(to_x(u_mid))
+        bad = np.abs(v_mid - (v[:-1] + v[1:]) / 2) > tol * y_range
+        if not bad.any():
+            break
+        # 需要细分的区间插入中点, 一次完成
+        u = np.insert(u, np.flatnonzero(bad) + 1, u_mid[bad])
+        v = np.insert(v, np.flatnonzero(bad) + 1, v_mid[bad])
+
+    return to_x(u), v
 
 x1_smooth, y1_smooth = smooth_curve(t1, s1)
 x2_smooth, y2_smooth = smooth_curve(t2, s2)
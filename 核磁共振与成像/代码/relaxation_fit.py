@@ -0,0 +1,160 @@
+import os
+import re
+import sys
+import glob
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from common.text_cache import load_text
+
+# =========================
+# CuSO4 溶液 T1 / T2 批量拟合
+# cuso4_*_T1.txt / cuso4_*_T2.txt 是仪器反演得到的弛豫时间谱 (幅度 vs 弛豫时间), 不是时域衰减曲线,
+# 所以弛豫时间取谱主峰的位置: 主峰在 ln t 上近似高斯 (对数正态)
+#   S(t) = A * exp(-(ln t - mu)^2 / (2 s^2)),  T = exp(mu)
+# 初值: ln S 对 ln t 是二次函数, 加权线性最小二乘一次得到
+# 之后所有曲线一起做 Gauss-Newton, 残差堆成 (曲线数, 点数) 数组, 雅可比解析给出
+# 0.01 ms 附近的边缘伪峰不属于主峰, 通过 "包含最大值的连续非零段" 自动去掉
+# =========================
+
+NAME_PATTERN = re.compile(r"cuso4_([\d.]+)_(T[12])\.txt$")
+
+
+def load_spectra(folder=".", pattern="cuso4_*_T?.txt"):
+    # 返回 (浓度, 类型, t, S); t 与 S 形状 (曲线数, 最大点数), 点数不足的曲线用 NaN 补齐
+    paths = sorted(p for p in glob.glob(os.path.join(folder, pattern)) if NAME_PATTERN.search(p))
+    concentration, kind, curves = [], [], []
+    for p in paths:
+        c, k = NAME_PATTERN.search(p).groups()
+        data = load_text(p)
+        data = data[np.argsort(data[:, 0])]
+        concentration.append(float(c))
+        kind.append(k)
+        curves.append(data)
+
+    n = max(len(d) for d in curves)
+    t = np.full((len(curves), n), np.nan)
+    s = np.full((len(curves), n), np.nan)
+    for i, d in enumerate(curves):
+        t[i, :len(d)], s[i, :len(d)] = d[:, 0], d[:, 1]
+    return np.array(concentration), np.array(kind), t, s
+
+
+def main_peak_mask(s):
+    # 每条曲线中包含最大值的连续正值段
+    positive = np.nan_to_num(s) > 0
+    run = np.cumsum(~positive, axis=1)
+    peak = np.nanargmax(s, axis=1)
+    return positive & (run == run[np.arange(len(s)), peak][:, None])
+
+
+def _model(logt, p):
+    A, mu, sig = (p[:, i, None] for i in range(3))
+    g = np.exp(-(logt - mu)**2 / (2 * sig**2))
+    f = A * g
+    # 雅可比: d f / d (A, mu, sig)
+    J = np.stack((g, f * (logt - mu) / sig**2, f * (logt - mu)**2 / sig**3), axis=-1)
+    return f, J
+
+
+def initial_guess(logt, s, w):
+    # ln S = c0 + c1 x + c2 x^2, 批量加权线性最小二乘
+    y = np.log(np.where(w > 0, s, 1.0))
+    X = np.stack((np.ones_like(logt), logt, logt**2), axis=-1)
+    Xw = X * w[..., None]
+    coef = np.linalg.solve(Xw.transpose(0, 2, 1) @ X, (Xw * y[..., None]).sum(axis=1)[..., None])[..., 0]
+    c0, c1, c2 = coef.T
+    c2 = np.minimum(c2, -1e-6)  # 开口向下才是峰
+    mu = -c1 / (2 * c2)
+    sig = np.sqrt(-1 / (2 * c2))
+    A = np.exp(c0 - c1**2 / (4 * c2))
+    return np.column_stack((A, mu, sig))
+
+
+def gauss_newton(logt, s, w, p0, max_iter=50, tol=1e-10):
+    # 所有曲线同时迭代, 每条曲线收敛后不再更新
+    p = p0.copy()
+    active = np.ones(len(p), dtype=bool)
+    for _ in range(max_iter):
+        f, J = _model(logt, p)
+        r = np.where(w > 0, s - f, 0.0)
+        Jw = J * w[..., None]
+        JTJ = Jw.transpose(0, 2, 1) @ J
+        step = np.linalg.solve(JTJ + 1e-12 * np.eye(3), (Jw * r[..., None]).sum(axis=1)[..., None])[..., 0]
+        p[active] += step[active]
+        active &= np.abs(step / p).max(axis=1) > tol
+        if not active.any():
+            break
+
+    f, J = _model(logt, p)
+    r = np.where(w > 0, s - f, 0.0)
+    Jw = J * w[..., None]
+    dof = np.maximum((w > 0).sum(axis=1) - 3, 1)
+    chi2 = (w * r**2).sum(axis=1)
+    cov = np.linalg.inv(Jw.transpose(0, 2, 1) @ J) * (chi2 / dof)[:, None, None]
+    return p, cov, chi2
+
+
+def fit_relaxation(t, s):
+    # t, s 形状 (曲线数, 点数), 返回每条曲线的弛豫时间、误差与谱宽
+    t = np.atleast_2d(t)
+    s = np.atleast_2d(s)
+    mask = main_peak_mask(s)
+    logt = np.log(np.where(mask, t, 1.0))
+    s = np.where(mask, s, 0.0)
+    w = mask.astype(float)
+
+    p0 = initial_guess(logt, s, w)
+    p, cov, chi2 = gauss_newton(logt, s, w, p0)
+    T = np.exp(p[:, 1])
+    return {
+        "T": T,
+        "T_err": T * np.sqrt(cov[:, 1, 1]),  # 峰位的拟合误差
+        "width": np.abs(p[:, 2]),  # 对数谱宽 (ln t 上的标准差)
+        "amplitude": p[:, 0],
+        "chi2": chi2,
+    }
+
+
+def fit_folder(folder="."):
+    # 返回 {"T1": {"c": 浓度, "T": ..., "T_err": ...}, "T2": {...}}, 按浓度排序
+    concentration, kind, t, s = load_spectra(folder)
+    fit = fit_relaxation(t, s)
+    results = {}
+    for k in np.unique(kind):
+        idx = np.flatnonzero(kind == k)
+        idx = idx[np.argsort(concentration[idx])]
+        results[k] = {"c": concentration[idx]}
+        results[k].update({key: value[idx] for key, value in fit.items()})
+    return results
+
+
+if __name__ == "__main__":
+    import matplotlib.pyplot as plt
+
+    folder = os.path.dirname(os.path.abspath(__file__))
+    results = fit_folder(folder)
+
+    plt.figure(figsize=(8, 6))
+    for k, color in (("T1", "green"), ("T2", "blue")):
+        r = results[k]
+        for c, T, dT, width in zip(r["c"], r["T"], r["T_err"], r["width"]):
+            print(f"{c:4g}% CuSO4  {k} = {T:7.3f} ± {dT:.3f} ms  (spectral width ×{np.exp(width):.2f})")
+
+        # 弛豫率与浓度成线性关系: 1/T = 1/T0 + r * c
+        rate = 1000 / r["T"]  # s^-1
+        rate_err = rate * r["T_err"] / r["T"]
+        slope, intercept = np.polyfit(r["c"], rate, 1)
+        print(f"  {k}: 1/{k} = {intercept:.2f} + {slope:.2f} * c  (s^-1, c in %)")
+
+        plt.errorbar(r["c"], rate, yerr=rate_err, fmt="o", color=color, capsize=4, label=f"1/{k}")
+        cc = np.linspace(0, r["c"].max() * 1.05, 50)
+        plt.plot(cc, slope * cc + intercept, "--", color=color)
+
+    plt.xlabel("CuSO4 concentration (%)", fontsize=16)
+    plt.ylabel("Relaxation rate (s$^{-1}$)", fontsize=16)
+    plt.legend(fontsize=14)
+    plt.grid(alpha=0.3)
+    plt.tight_layout()
+    plt.show()
@@ -0,0 +1,63 @@
+import numpy as np
+
+# =========================
+# 参数空间 χ² 扫描
+# 模型形如 model(x, **params), 参数以列向量 (m, 1) 传入, 与 x[None, :] 广播,
+# 一次算出 m 组参数的预测值; 网格按块计算, 内存占用不超过 max_elements
+# =========================
+
+
+def chi2_landscape(model, x, y, axes, sigma=None, fixed=None, max_elements=4_000_000):
+    # axes: {参数名: 一维取值数组}, 返回形状为 (len(axis1), len(axis2), ...) 的 χ² 曲面
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    w = 1.0 / (np.ones_like(y) if sigma is None else np.asarray(sigma, dtype=float))**2
+    fixed = {} if fixed is None else fixed
+
+    names = list(axes)
+    values = [np.asarray(axes[name], dtype=float) for name in names]
+    shape = tuple(len(v) for v in values)
+    total = int(np.prod(shape))
+    chunk = max(1, max_elements // len(x))
+
+    chi2 = np.empty(total)
+    for start in range(0, total, chunk):
+        flat = np.arange(start, min(start + chunk, total))
+        idx = np.unravel_index(flat, shape)
+        params = {name: v[i][:, None] for name, v, i in zip(names, values, idx)}
+        with np.errstate(over="ignore", invalid="ignore"):
+            pred = model(x[None, :], **params, **fixed)
+        chi2[flat] = np.sum(w * (pred - y)**2, axis=1)
+    # 数值溢出的参数组合视为无穷差
+    chi2[~np.isfinite(chi2)] = np.inf
+    return chi2.reshape(shape)
+
+
+def refine_landscape(model, x, y, ranges, n_points=101, levels=4, shrink=0.1,
+                     sigma=None, fixed=None, max_elements=4_000_000):
+    # ranges: {参数名: (下限, 上限)}
+    # 先在全范围扫描, 再围绕最小值逐级缩小范围 (每级缩小为 shrink 倍) 重新扫描
+    # 返回 (最优参数, 全范围各轴取值, 全范围 χ² 曲面), 曲面可直接用于画等高线
+    names = list(ranges)
+    lo = np.array([ranges[name][0] for name in names], dtype=float)
+    hi = np.array([ranges[name][1] for name in names], dtype=float)
+
+    full_axes = None
+    full_chi2 = None
+    best = None
+    for level in range(levels):
+        axes = {name: np.linspace(l, h, n_points) for name, l, h in zip(names, lo, hi)}
+        chi2 = chi2_landscape(model, x, y, axes, sigma=sigma, fixed=fixed,
+                              max_elements=max_elements)
+        if level == 0:
+            full_axes, full_chi2 = axes, chi2
+        i_min = np.unravel_index(np.argmin(chi2), chi2.shape)
+        best = {name: axes[name][i] for name, i in zip(names, i_min)}
+
+        # 新范围以最小值为中心, 但不超出原始范围
+        center = np.array([best[name] for name in names])
+        half = 0.5 * (hi - lo) * shrink
+        lo = np.maximum(center - half, [ranges[name][0] for name in names])
+        hi = np.minimum(center + half, [ranges[name][1] for name in names])
+
+    return best, full_axes, full_chi2
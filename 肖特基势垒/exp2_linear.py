@@ -1,32 +1,19 @@
 import numpy as np
 import matplotlib.pyplot as plt
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.bootstrap import bootstrap_fit, line
+from common.regression import fit_line
+from iv_data import load_iv
 
 filename = "exp2.txt"
 
-dVdI_list = []
-one_over_I_list = []
-T_list = []
-
-# 读取数据
-with open(filename, "r") as f:
-    for _ in range(2):
-        f.readline()  # 跳过表头
-    for line in f:
-        parts = line.strip().split()
-        if len(parts) >= 5:
-            try:
-                T_val = float(parts[2])
-                dVdI_val = float(parts[3])
-                one_over_I_val = float(parts[4])
-                T_list.append(T_val)
-                dVdI_list.append(dVdI_val)
-                one_over_I_list.append(one_over_I_val)
-            except ValueError:
-                continue
-
-T_arr = np.array(T_list)
-dVdI_arr = np.array(dVdI_list)
-one_over_I_arr = np.array(one_over_I_list)
+# 读取数据 (跳过两行表头, 五列都是数字的行)
+data = load_iv(filename, min_cols=5)
+T_arr = data["T"]
+dVdI_arr = data["dVdI"]
+one_over_I_arr = data["inv_I"]
 
 # 温度平均值
 T_mean = np.mean(T_arr)
@@ -38,26 +25,14 @@ x = one_over_I_arr[mask]
 y = dVdI_arr[mask]
 
 # ===========================
-# 手动线性拟合 + 正确的斜率和截距不确定度
+# 线性拟合及斜率、截距的不确定度 (common/regression.py)
 # ===========================
-n = len(x)
-x_mean = np.mean(x)
-y_mean = np.mean(y)
-
-# 斜率和截距
-slope = np.sum((x - x_mean)*(y - y_mean)) / np.sum((x - x_mean)**2)
-intercept = y_mean - slope * x_mean
-
-# 残差标准差
-residuals = y - (slope*x + intercept)
-s_err = np.sqrt(np.sum(residuals**2)/(n-2))
-
-# 标准误
-slope_err = s_err / np.sqrt(np.sum((x - x_mean)**2))
-intercept_err = s_err * np.sqrt(1/n + x_mean**2 / np.sum((x - x_mean)**2))
+fit = fit_line(x, y)
+slope, intercept = fit["slope"], fit["intercept"]
+slope_err, intercept_err = fit["slope_err"], fit["intercept_err"]
 
 # R^2
-r_squared = np.corrcoef(x, y)[0,1]**2
+r_squared = fit["r"]**2
 
 # ===========================
 # 绘图
@@ -86,3 +61,9 @@ print("拟合直线方程: dV/dI = slope * (1/I) + intercept")
 print(f"slope = {slope:.5f} ± {slope_err:.5f} V/A^2")
 print(f"intercept = {intercept:.5f} ± {intercept_err:.5f} Ω")
 print(f"皮尔逊 r^2 = {r_squared:.5f}")
+
+# Bootstrap 95% 置信区间
+boot = bootstrap_fit(line, x, y, [slope, intercept])
+(slope_lo, intercept_lo), (slope_hi, intercept_hi) = boot["percentiles"][[0, 2]]
+print(f"slope 95% 区间 = [{slope_lo:.5f}, {slope_hi:.5f}] V/A^2")
+print(f"intercept 95% 区间 = [{intercept_lo:.5f}, {intercept_hi:.5f}] Ω")
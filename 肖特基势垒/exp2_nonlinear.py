@@ -1,46 +1,42 @@
 import numpy as np
 import matplotlib.pyplot as plt
 from scipy.optimize import curve_fit
+from schottky_model import solve_current, current_partials
+from iv_data import parse_iv
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.bootstrap import bootstrap_fit
+from common.text_cache import load_text
 
 # 常数
 q = 1.602e-19  # C
 k = 1.381e-23  # J/K
 T = 299.81     # K
 
-# 定义模型 (通过牛顿迭代解 I)
+# 定义模型 (隐式方程一次性对全部电压点求解, 默认 Lambert-W 闭式解)
 def diode_eq(V, I0, n, R):
-    I = np.zeros_like(V)
-    for j in range(len(V)):
-        I_guess = 1e-6
-        for _ in range(100):
-            f = I_guess - I0*(np.exp(q*(V[j]-I_guess*R)/(n*k*T)) - 1)
-            df = 1 - I0*np.exp(q*(V[j]-I_guess*R)/(n*k*T)) * (-q*R/(n*k*T))
-            I_guess -= f/df
-        I[j] = I_guess
-    return I
+    return solve_current(V, I0, n*k*T/q, R)
 
-# 清理文件: 找到第一行包含数字的地方
+# 解析雅可比矩阵, 供 curve_fit 使用
+def diode_jac(V, I0, n, R):
+    a = n*k*T/q
+    I = solve_current(V, I0, a, R)
+    dI_dI0, dI_da, dI_dR = current_partials(V, I, I0, a, R)
+    return np.column_stack((dI_dI0, dI_da * k*T/q, dI_dR))
+
+# 清理文件: 只保留前两列是数字的行
 def load_data(fname):
-    lines = []
-    with open(fname, "r", encoding="utf-8") as f:
-        for line in f:
-            parts = line.strip().split()
-            # 至少两列，且第一列能转成数字
-            if len(parts) >= 2:
-                try:
-                    float(parts[0]); float(parts[1])
-                    lines.append(line)
-                except ValueError:
-                    continue
-    return np.loadtxt(lines)
+    return load_text(fname, parser=parse_iv, skiprows=0, min_cols=2)
 
 # 读取数据
 data = load_data("exp2.txt")
 I_exp = data[:,0] * 1e-6  # µA -> A
 V_exp = data[:,1] * 1e-3  # mV -> V
 
-# 拟合
-popt, pcov = curve_fit(diode_eq, V_exp, I_exp, p0=[1e-12, 1.5, 10])
+# 拟合 (串联电阻 R >= 0, 模型与雅可比只在这个范围内定义)
+popt, pcov = curve_fit(diode_eq, V_exp, I_exp, p0=[1e-12, 1.5, 10], jac=diode_jac,
+                       bounds=([-np.inf, -np.inf, 0], np.inf))
 perr = np.sqrt(np.diag(pcov))
 
 I0, n, R = popt
@@ -50,6 +46,11 @@ print(f"I0 = {I0:.3e} ± {I0_err:.3e} A")
 print(f"n  = {n:.3f} ± {n_err:.3f}")
 print(f"R  = {R:.3f} ± {R_err:.3f} Ω")
 
+# Bootstrap 95% 置信区间 (残差重采样, 从拟合结果出发)
+boot = bootstrap_fit(diode_eq, V_exp, I_exp, popt, jac=diode_jac, n_boot=2000)
+for name, lo, hi in zip(["I0", "n", "R"], *boot["percentiles"][[0, 2]]):
+    print(f"{name} 95% 区间: [{lo:.4g}, {hi:.4g}]")
+
 # 绘图
 plt.figure(figsize=(6,5))
 plt.scatter(V_exp*1e3, I_exp*1e6, label="Data", color="black")  # µA
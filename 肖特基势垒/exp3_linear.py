@@ -1,6 +1,10 @@
 import numpy as np
 import matplotlib.pyplot as plt
-from scipy import stats
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.bootstrap import bootstrap_fit, line
+from common.regression import fit_line
 
 # 实验数据
 T = np.array([289.81, 293.68, 299.58, 303.70, 309.24, 314.56])  # K
@@ -16,22 +20,20 @@ Ae = 2.83e-3  # cm^2
 y = np.log(I / T**2)
 x = 1000 / T
 
-# 线性回归 - 获取斜率和截距的标准误
-slope, intercept, r_value, p_value, std_err = stats.linregress(x, y)
-# std_err 是斜率的标准误，需要计算截距的标准误
-
-n = len(x)
-x_mean = np.mean(x)
-Sxx = np.sum((x - x_mean)**2)
-s_err = np.sqrt(np.sum((y - (slope*x + intercept))**2) / (n-2))
-
-# 正确的标准误计算
-slope_err = std_err  # linregress返回的就是斜率标准误
-intercept_err = s_err * np.sqrt(1/n + x_mean**2 / Sxx)
+# 线性回归及斜率、截距的标准误 (common/regression.py)
+fit = fit_line(x, y)
+slope, intercept = fit["slope"], fit["intercept"]
+slope_err, intercept_err = fit["slope_err"], fit["intercept_err"]
 
 print(f"斜率 m = {slope:.3f} ± {slope_err:.3f}")
 print(f"截距 b = {intercept:.3f} ± {intercept_err:.3f}")
 
+# Bootstrap 95% 置信区间
+boot = bootstrap_fit(line, x, y, [slope, intercept])
+(slope_lo, intercept_lo), (slope_hi, intercept_hi) = boot["percentiles"][[0, 2]]
+print(f"斜率 95% 区间 = [{slope_lo:.3f}, {slope_hi:.3f}]")
+print(f"截距 95% 区间 = [{intercept_lo:.3f}, {intercept_hi:.3f}]")
+
 # 计算物理参数
 n = 1.304  # 理想因子
 phi_b = -slope * k / q * 1000 + V_mean / n
@@ -43,4 +45,4 @@ Astar_err = Astar * intercept_err  # d(A**)/A** = d(intercept)
 
 print(f"肖特基势垒高度 φ_b = {phi_b:.4f} ± {phi_b_err:.4f} eV")
 print(f"有效理查逊常数 A** = {Astar:.2f} ± {Astar_err:.2f} A/cm²·K²")
-print(f"R² = {r_value**2:.5f}")
+print(f"R² = {fit['r']**2:.5f}")
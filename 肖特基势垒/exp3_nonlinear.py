@@ -1,6 +1,11 @@
 import numpy as np
-from scipy.optimize import newton, curve_fit
+from scipy.optimize import curve_fit
 import matplotlib.pyplot as plt
+from schottky_model import thermionic_current, thermionic_jacobian
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.bootstrap import bootstrap_fit
 
 # =========================
 # 实验数据
@@ -23,26 +28,19 @@ k = 1.380649e-23
 # 隐式肖特基 I-V 模型（用平均电压）
 # =========================
 def diode_IV_avgV(T_array, phi_b, Astar):
-    I_out = []
-    for T_i in T_array:
-        Is = Ae * Astar * T_i**2 * np.exp(-q*phi_b/(k*T_i))
-        # 定义方程 f(I)=0
-        def f(I):
-            return I - Is*(np.exp(q*(V_mean - I*R)/(n*k*T_i))-1)
-        I0 = Is * np.exp(q * V_mean / (n * k * T_i)-1)  # 固定初值
-        try:
-            I_sol = newton(f, I0, maxiter=1000, tol=1e-12)
-        except RuntimeError:
-            # 如果Newton法失败，使用近似解
-            I_sol = Is * np.exp(q*V_mean/(n*k*T_i))
-        I_out.append(I_sol)
-    return np.array(I_out)
+    # 所有温度点一次性求解 (Lambert-W 闭式解)
+    return thermionic_current(T_array, V_mean, phi_b, Astar, Ae, n, R)
+
+# 解析雅可比矩阵 (对 phi_b, A**)
+def diode_IV_jac(T_array, phi_b, Astar):
+    _, dI_dphi, dI_dA = thermionic_jacobian(T_array, V_mean, phi_b, Astar, Ae, n, R)
+    return np.column_stack((dI_dphi, dI_dA))
 
 # =========================
 # 拟合
 # =========================
 p0 = [0.8, 45]  # 修正初值: phi_b ≈ 0.8 eV, A** ≈ 100 A/cm^2·K^2
-popt, pcov = curve_fit(diode_IV_avgV, T_list, I_list, p0=p0, maxfev=5000)
+popt, pcov = curve_fit(diode_IV_avgV, T_list, I_list, p0=p0, jac=diode_IV_jac, maxfev=5000)
 phi_b_fit, Astar_fit = popt
 phi_b_err, Astar_err = np.sqrt(np.diag(pcov))
 
@@ -50,6 +48,12 @@ print(f"拟合结果:")
 print(f"q*phi_b = {phi_b_fit:.4f} eV ± {phi_b_err:.4f} eV")
 print(f"A** = {Astar_fit:.2f} A/cm^2·K^2 ± {Astar_err:.2f} A/cm^2·K^2")
 
+# Bootstrap 95% 置信区间 (残差重采样, 从拟合结果出发)
+boot = bootstrap_fit(diode_IV_avgV, T_list, I_list, popt, jac=diode_IV_jac, n_boot=2000)
+(phi_lo, A_lo), (phi_hi, A_hi) = boot["percentiles"][[0, 2]]
+print(f"q*phi_b 95% 区间: [{phi_lo:.4f}, {phi_hi:.4f}] eV")
+print(f"A** 95% 区间: [{A_lo:.2f}, {A_hi:.2f}] A/cm^2·K^2")
+
 # =========================
 # 绘图
 # =========================
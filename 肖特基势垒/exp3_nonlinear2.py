@@ -1,6 +1,12 @@
 import numpy as np
-from scipy.optimize import newton, curve_fit
+from scipy.optimize import curve_fit
 import matplotlib.pyplot as plt
+from schottky_model import thermionic_current, thermionic_jacobian
+from chi2_landscape import refine_landscape
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.bootstrap import bootstrap_fit
 
 # =========================
 # Experimental Data
@@ -23,28 +29,13 @@ k = 1.380649e-23
 # Exact Schottky I-V Model
 # =========================
 def diode_IV_exact(T_array, phi_b, Astar):
-    I_out = []
-    for T_i in T_array:
-        # Saturation current
-        Is = Ae * Astar * T_i**2 * np.exp(-q * phi_b / (k * T_i))
-        
-        # Exact solution of implicit equation I = Is * [exp(q(V - IR)/(nkT)) - 1]
-        # For forward bias, the -1 term can be neglected
-        def f(I):
-            return I - Is * (np.exp(q * (V_mean - I * R) / (n * k * T_i))-1)
-        
-        # Use better initial guess
-        I0_guess = Is * np.exp(q * V_mean / (n * k * T_i)-1)
-        
-        try:
-            I_sol = newton(f, I0_guess, maxiter=1000, tol=1e-12)
-        except:
-            # If fails, use approximate solution as backup
-            I_sol = I0_guess
-        
-        I_out.append(I_sol)
-    
-    return np.array(I_out)
+    # Exact solution of I = Is * [exp(q(V - IR)/(nkT)) - 1] for all temperatures at once
+    return thermionic_current(T_array, V_mean, phi_b, Astar, Ae, n, R)
+
+# Analytic Jacobian with respect to (phi_b, Astar)
+def diode_IV_jac(T_array, phi_b, Astar):
+    _, dI_dphi, dI_dA = thermionic_jacobian(T_array, V_mean, phi_b, Astar, Ae, n, R)
+    return np.column_stack((dI_dphi, dI_dA))
 
 # =========================
 # Fitting - Using expected Astar range
@@ -53,13 +44,18 @@ def diode_IV_exact(T_array, phi_b, Astar):
 p0 = [0.8, 45]  # phi_b ≈ 0.8 eV, A** ≈ 45 A/cm^2·K^2
 
 try:
-    popt, pcov = curve_fit(diode_IV_exact, T_list, I_list, p0=p0, maxfev=5000)
+    popt, pcov = curve_fit(diode_IV_exact, T_list, I_list, p0=p0, jac=diode_IV_jac, maxfev=5000)
     phi_b_fit, Astar_fit = popt
     phi_b_err, Astar_err = np.sqrt(np.diag(pcov))
     
     print(f"Fitting Results:")
     print(f"Barrier height φ_b = {phi_b_fit:.4f} ± {phi_b_err:.4f} eV")
     print(f"Richardson constant A** = {Astar_fit:.2f} ± {Astar_err:.2f} A/cm²·K²")
+
+    # Bootstrap 95% confidence intervals (residual resampling, warm-started from popt)
+    boot = bootstrap_fit(diode_IV_exact, T_list, I_list, popt, jac=diode_IV_jac, n_boot=2000)
+    (phi_lo, A_lo), (phi_hi, A_hi) = boot["percentiles"][[0, 2]]
+    print(f"Bootstrap 95% CI: φ_b in [{phi_lo:.4f}, {phi_hi:.4f}] eV, A** in [{A_lo:.2f}, {A_hi:.2f}] A/cm²·K²")
     
     # =========================
     # Plot Verification
@@ -140,27 +136,31 @@ try:
 except Exception as e:
     print(f"Fitting failed: {e}")
     
-    # Manual parameter scanning
-    print("\nPerforming manual parameter scan...")
-    best_error = float('inf')
-    best_params = None
-    
-    # Scan around your expected Astar range
-    phi_b_range = np.linspace(0.75, 0.85, 30)
-    Astar_range = np.linspace(35, 55, 30)
-    
-    for phi_b in phi_b_range:
-        for Astar in Astar_range:
-            I_pred = diode_IV_exact(T_list, phi_b, Astar)
-            error = np.sum(np.abs((I_pred - I_list) / I_list))
-            
-            if error < best_error:
-                best_error = error
-                best_params = (phi_b, Astar)
-    
-    if best_params:
-        phi_b_manual, Astar_manual = best_params
-        print(f"Best parameters from manual search:")
-        print(f"Barrier height φ_b = {phi_b_manual:.4f} eV")
-        print(f"Richardson constant A** = {Astar_manual:.2f} A/cm²·K²")
-        print(f"Mean relative error: {best_error/len(T_list)*100:.2f}%")
+    # Vectorized parameter scan with successive refinement around the minimum
+    print("\nPerforming parameter landscape scan...")
+    def landscape_model(T, phi_b, Astar):
+        return thermionic_current(T, V_mean, phi_b, Astar, Ae, n, R)
+
+    # Scan around your expected Astar range, relative residuals as in the fit quality analysis
+    best_params, scan_axes, chi2_surface = refine_landscape(
+        landscape_model, T_list, I_list,
+        {"phi_b": (0.75, 0.85), "Astar": (35, 55)},
+        n_points=201, levels=4, sigma=I_list)
+
+    phi_b_manual, Astar_manual = best_params["phi_b"], best_params["Astar"]
+    I_pred = diode_IV_exact(T_list, phi_b_manual, Astar_manual)
+    mean_error = np.mean(np.abs((I_pred - I_list) / I_list))
+    print(f"Best parameters from landscape scan:")
+    print(f"Barrier height φ_b = {phi_b_manual:.4f} eV")
+    print(f"Richardson constant A** = {Astar_manual:.2f} A/cm²·K²")
+    print(f"Mean relative error: {mean_error*100:.2f}%")
+
+    # χ² landscape over the full scan range
+    plt.figure(figsize=(6, 5))
+    plt.contourf(scan_axes["Astar"], scan_axes["phi_b"], np.log10(chi2_surface), levels=30)
+    plt.colorbar(label='log10 χ²')
+    plt.scatter(Astar_manual, phi_b_manual, color='red', marker='x')
+    plt.xlabel('A** (A/cm²·K²)', fontsize=16)
+    plt.ylabel('φ_b (eV)', fontsize=16)
+    plt.tight_layout()
+    plt.show()
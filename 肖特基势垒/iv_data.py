@@ -0,0 +1,153 @@
+import io
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.text_cache import load_text
+
+# =========================
+# IV.txt / exp2.txt 读取
+# 两行表头之后每行: I (µA)  V (mV)  T (K)  dV/dI (Ω)  1/I (1/A), 后两列可能缺失或为 nan
+# 快速路径: 整个文件 (去掉表头) 一次交给 np.loadtxt 的 C 解析器, 各行字段数相同且都是数字时直接成功
+# 失败时: bytes.translate 把非数字字符都换成 \0, 用 find 跳到含 \0 的行 (说明文字、坏行), 只有这些行逐行解析,
+#   其余行拼回一块再整体转换一次
+# 其余行字段数不同或有空行时, 在字节数组上算出每行的字段数, 按字段数分组各自整体转换
+# 只保留前 min_cols 列都是数字的行, 缺失或非数字的其余列记为 nan
+# 结果经 text_cache 缓存, 同一文件第二次读取直接映射 .npy
+# =========================
+
+COLUMNS = ("I", "V", "T", "dVdI", "inv_I")
+
+# 数字行里可能出现的字节 (含 nan / inf)
+_NUMERIC_CHARS = b"0123456789+-.eEnNaAiIfF \t\r\n\v\f"
+# 非数字字节 -> \0
+_MARK_DIRTY = bytes(c if c in _NUMERIC_CHARS else 0 for c in range(256))
+_WHITESPACE = np.zeros(256, dtype=bool)
+_WHITESPACE[list(b" \t\r\n\v\f")] = True
+
+
+def _parse_line(fields, min_cols, n_cols):
+    # 逐行解析; 不足 min_cols 列或前 min_cols 列不是数字时返回 None
+    if len(fields) < min_cols:
+        return None
+    values = []
+    for i, f in enumerate(fields[:n_cols]):
+        try:
+            values.append(float(f))
+        except ValueError:
+            if i < min_cols:
+                return None
+            values.append(np.nan)
+    return values + [np.nan] * (n_cols - len(values))
+
+
+def _parse_lines(lines, min_cols, n_cols):
+    # 逐行解析一组行, 返回 (解析成功的行在 lines 中的下标, (行数, n_cols) 数组)
+    parsed = [_parse_line(line.split(), min_cols, n_cols) for line in lines]
+    good = np.array([p is not None for p in parsed], dtype=bool)
+    return np.flatnonzero(good), np.array([p for p in parsed if p is not None]).reshape(-1, n_cols)
+
+
+def _bulk(buf, min_cols, n_cols):
+    # 字段数相同的数字文本一次转换, 截断或补 nan 到 n_cols 列; 不能整体转换时返回 None
+    # 空行被跳过; 字段数不足 min_cols 时没有数据行
+    if not buf or buf.isspace():
+        return np.empty((0, n_cols))
+    try:
+        block = np.loadtxt(io.BytesIO(buf), comments=None, ndmin=2, encoding="latin-1")
+    except ValueError:
+        return None
+    if block.shape[1] < min_cols:
+        return np.empty((0, n_cols))
+    block = block[:, :n_cols]
+    return np.hstack((block, np.full((len(block), n_cols - block.shape[1]), np.nan)))
+
+
+def _split_dirty(buf):
+    # 含非数字字符的行挑出来; 返回 (其余行拼成的字节, 每个挑出行之前的其余行数, 挑出的行)
+    marked = buf.translate(_MARK_DIRTY)
+    segments, clean_before, dirty = [], [], []
+    n_clean, pos = 0, 0
+    while (hit := marked.find(b"\0", pos)) >= 0:
+        start = marked.rfind(b"\n", pos, hit) + 1 or pos
+        end = marked.find(b"\n", hit)
+        end = len(buf) if end < 0 else end
+        segments.append(buf[pos:start])
+        n_clean += buf.count(b"\n", pos, start)
+        clean_before.append(n_clean)
+        dirty.append(buf[start:end])
+        pos = end + 1
+    segments.append(buf[pos:])
+    return b"".join(segments), np.array(clean_before, dtype=int), dirty
+
+
+def _parse_by_width(buf, min_cols, n_cols):
+    # 通用路径: 在字节数组上算出每行的字段数和是否含非数字字符, 干净的行按字段数分组整体转换
+    a = np.frombuffer(buf, dtype=np.uint8)
+    newline = np.flatnonzero(a == ord("\n"))
+    starts = np.concatenate(([0], newline + 1))
+    ends = np.concatenate((newline, [len(a)]))
+    space = _WHITESPACE[a]
+    field_start = np.flatnonzero(~space & np.concatenate(([True], space[:-1])))
+    width = np.bincount(np.searchsorted(newline, field_start), minlength=len(starts))
+    dirty = np.zeros(len(starts), dtype=bool)
+    dirty[np.searchsorted(newline, np.flatnonzero(np.frombuffer(buf.translate(_MARK_DIRTY), dtype=np.uint8) == 0))] = True
+    data = width >= min_cols
+
+    index, blocks = [], []
+    for k in np.unique(width[data & ~dirty]):
+        rows = np.flatnonzero((width == k) & ~dirty)
+        mark = np.zeros(len(a) + 2, dtype=np.int8)
+        mark[starts[rows]] += 1
+        mark[ends[rows] + 1] -= 1
+        block = _bulk(a[np.cumsum(mark[:len(a)], dtype=np.int8).view(bool)].tobytes(), min_cols, n_cols)
+        if block is None or len(block) != len(rows):
+            # 只由数字字符组成却不是合法数字 (如 "1.2.3", 单独的 "-"), 这一组逐行解析
+            dirty[rows] = True
+            continue
+        index.append(rows)
+        blocks.append(block)
+
+    rows = np.flatnonzero(dirty & data)
+    good, block = _parse_lines([buf[starts[i]:ends[i]] for i in rows], min_cols, n_cols)
+    index.append(rows[good])
+    blocks.append(block)
+    order = np.argsort(np.concatenate(index), kind="stable")
+    return np.vstack(blocks)[order]
+
+
+def parse_iv(path, skiprows=2, min_cols=3, n_cols=len(COLUMNS)):
+    # 返回 (行数, n_cols) 的 float 数组, 行序与文件一致
+    with open(path, "rb") as f:
+        buf = f.read()
+    pos = 0
+    for _ in range(skiprows):
+        pos = buf.find(b"\n", pos) + 1
+        if pos == 0:
+            return np.empty((0, n_cols))
+    buf = buf[pos:]
+    block = _bulk(buf, min_cols, n_cols)
+    if block is not None:
+        return block
+
+    clean, clean_before, dirty = _split_dirty(buf)
+    block = _bulk(clean, min_cols, n_cols)
+    n_clean = clean.count(b"\n") + (len(clean) > 0 and not clean.endswith(b"\n"))
+    if block is None or len(block) != n_clean:
+        # 其余行字段数不同、有空行或有不合法的数字
+        return _parse_by_width(buf, min_cols, n_cols)
+
+    # 挑出的第 j 行在文件中排在 clean_before[j] 行干净行之后
+    good, parsed = _parse_lines(dirty, min_cols, n_cols)
+    clean_index = np.arange(len(block)) + np.searchsorted(clean_before, np.arange(len(block)), side="right")
+    dirty_index = clean_before[good] + good
+    order = np.argsort(np.concatenate((clean_index, dirty_index)), kind="stable")
+    return np.vstack((block, parsed))[order]
+
+
+def load_iv(path, skiprows=2, min_cols=3):
+    # 返回 {"I": ..., "V": ..., "T": ..., "dVdI": ..., "inv_I": ...}, 各列为只读数组
+    data = load_text(path, parser=parse_iv, skiprows=skiprows, min_cols=min_cols)
+    return {name: data[:, i] for i, name in enumerate(COLUMNS)}
@@ -0,0 +1,125 @@
+import numpy as np
+from scipy.special import lambertw
+
+# =========================
+# 隐式二极管方程 I = Is*(exp((V-I*R)/a)-1), a = n*k*T/q
+# 所有参数都可以广播, 一次求解整个 V 数组
+# =========================
+
+# 超过这个值时 exp(x) 会溢出, 改用渐近迭代求 W(e^x)
+_WEXP_SWITCH = 500.0
+
+
+def _lambertw_exp(x):
+    # 计算 W(exp(x)), 避免 exp(x) 溢出
+    x = np.asarray(x, dtype=float)
+    w = np.empty_like(x)
+    small = x < _WEXP_SWITCH
+    w[small] = lambertw(np.exp(x[small])).real
+    if np.any(~small):
+        xb = x[~small]
+        wb = xb - np.log(xb)
+        # 解 w + ln(w) = x, 初值已经很接近, 几步牛顿即可
+        for _ in range(6):
+            wb -= (wb + np.log(wb) - xb) / (1 + 1 / wb)
+        w[~small] = wb
+    return w
+
+
+def _current_lambertw(V, Is, a, R):
+    # 闭式解: I = a/R * W(Is*R/a * exp((V+Is*R)/a)) - Is
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        x = np.log(Is * R / a) + (V + Is * R) / a
+        I = a / R * _lambertw_exp(x) - Is
+        # R = 0 时退化为理想二极管
+        return np.where(R > 0, I, Is * np.expm1(V / a))
+
+
+def _current_newton(V, Is, a, R, tol, maxiter):
+    # 带区间保护的向量化牛顿法, 所有电压点同时迭代
+    # 取对数形式 g(I) = I*R + a*ln(1+I/Is) - V = 0, 避免 exp 溢出, 大电流时近似线性
+    # 正向: 0 <= I <= min(V/R, Is*(exp(V/a)-1)); 反向: max(-Is, V/R) <= I <= 0
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        V_R = np.where(R > 0, V / R, np.inf * np.sign(V))
+        I_ideal = Is * np.expm1(V / a)
+    lo = np.where(V < 0, np.maximum(-Is, V_R), 0.0)
+    hi = np.where(V < 0, 0.0, np.minimum(V_R, I_ideal))
+    I = 0.5 * (lo + hi)
+
+    # R = 0 且 V 很大时理想电流本身溢出, 这里不再额外报警
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        active = np.ones(I.shape, dtype=bool)
+        for _ in range(maxiter):
+            g = I * R + a * np.log1p(I / Is) - V
+            dg = R + a / (Is + I)
+            # g 单调递增, 用符号收缩区间
+            lo = np.where(active & (g < 0), I, lo)
+            hi = np.where(active & (g > 0), I, hi)
+            I_new = I - g / dg
+            outside = ~((I_new > lo) & (I_new < hi))
+            I_new = np.where(outside, 0.5 * (lo + hi), I_new)
+            step = np.abs(I_new - I)
+            I = np.where(active, I_new, I)
+            active &= step > tol * np.maximum(np.abs(I), Is)
+            if not np.any(active):
+                break
+    return I
+
+
+def _check_resistance(R):
+    # 负的串联电阻没有物理意义, 闭式解也只对 R >= 0 成立 (R = 0 为理想二极管);
+    # 拟合 R 时请给 curve_fit 传 bounds, 保证 R >= 0
+    if np.any(np.asarray(R) < 0):
+        raise ValueError("series resistance R must be >= 0")
+
+
+def solve_current(V, Is, a, R, method="lambertw", tol=1e-12, maxiter=100):
+    # V: 电压 (V), Is: 饱和电流 (A), a = n*k*T/q (V), R: 串联电阻 (Ω, >= 0)
+    _check_resistance(R)
+    V, Is, a, R = np.broadcast_arrays(*(np.asarray(p, dtype=float) for p in (V, Is, a, R)))
+    if method == "lambertw":
+        return _current_lambertw(V, Is, a, R)
+    if method == "newton":
+        return _current_newton(V, Is, a, R, tol, maxiter)
+    raise ValueError(f"unknown method: {method}")
+
+
+def current_partials(V, I, Is, a, R):
+    # 隐函数求导, F(I) = I - Is*(exp(u)-1), u = (V-I*R)/a
+    # 返回 dI/dIs, dI/da, dI/dR; 与 solve_current 一样只接受 R >= 0
+    _check_resistance(R)
+    e = np.exp(np.minimum((V - I * R) / a, 700.0))
+    D = 1 + Is * e * R / a
+    dI_dIs = (e - 1) / D
+    dI_da = -Is * e * (V - I * R) / a**2 / D
+    dI_dR = -Is * e * I / a / D
+    return dI_dIs, dI_da, dI_dR
+
+
+# =========================
+# 热电子发射模型: Is = Ae * A** * T^2 * exp(-q*phi_b/(k*T))
+# T 与 V 可以是任意可广播的数组, 一次求解所有 (T, V) 组合
+# =========================
+q = 1.602176634e-19
+k = 1.380649e-23
+
+
+def saturation_current(T, phi_b, Astar, Ae):
+    # phi_b 以 eV 为单位, Ae 以 cm^2 为单位
+    return Ae * Astar * T**2 * np.exp(-phi_b * q / (k * T))
+
+
+def thermionic_current(T, V, phi_b, Astar, Ae, n, R, method="lambertw"):
+    Is = saturation_current(T, phi_b, Astar, Ae)
+    return solve_current(V, Is, n * k * T / q, R, method=method)
+
+
+def thermionic_jacobian(T, V, phi_b, Astar, Ae, n, R, method="lambertw"):
+    # 返回 I 以及 dI/dphi_b, dI/dA**
+    a = n * k * T / q
+    Is = saturation_current(T, phi_b, Astar, Ae)
+    I = solve_current(V, Is, a, R, method=method)
+    dI_dIs = current_partials(V, I, Is, a, R)[0]
+    dI_dphi = dI_dIs * Is * (-q / (k * T))
+    dI_dA = dI_dIs * Is / Astar
+    return I, dI_dphi, dI_dA
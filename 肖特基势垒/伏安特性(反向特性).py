@@ -1,30 +1,14 @@
 import matplotlib.pyplot as plt
 import numpy as np
+from iv_data import load_iv
 
 filename = "IV.txt"
 
-I, V, T = [], [], []
-
-# 读取文件
-with open(filename, "r") as f:
-    for _ in range(2):  # 跳过表头
-        f.readline()
-    for line in f:
-        parts = line.strip().split()
-        if len(parts) >= 3:
-            try:
-                i_val = float(parts[0])
-                v_val = float(parts[1])
-                t_val = float(parts[2])
-                I.append(i_val)
-                V.append(v_val)
-                T.append(t_val)
-            except ValueError:
-                continue
-
-I = np.array(I)
-V = np.array(V)
-T = np.array(T)
+# 读取文件 (跳过两行表头, 前三列 I, V, T 都是数字的行)
+data = load_iv(filename)
+I = data["I"]
+V = data["V"]
+T = data["T"]
 
 # 只选择 V<0 的部分
 I_negV = I[V<0]